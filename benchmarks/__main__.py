@@ -0,0 +1,159 @@
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+def construct_parser() -> ArgumentParser:
+    parser = ArgumentParser(prog="python -m benchmarks", description="benchmark picstore on synthetic archives")
+    parser.add_argument("-c", "--cases",
+                        help="cases to run (all if omitted)",
+                        nargs="+")
+    parser.add_argument("-n", "--picdirs",
+                        help="numbers of picdirs in the synthetic parent dir",
+                        type=int,
+                        nargs="+",
+                        default=[10, 100, 1000])
+    parser.add_argument("--files",
+                        help="files per sub directory of a picdir",
+                        type=int,
+                        default=10)
+    parser.add_argument("--own-ratio",
+                        help="share of pictures taken with own cameras",
+                        type=float,
+                        default=0.8)
+    parser.add_argument("--opaque-ratio",
+                        help="share of pictures only the (fake) exiftool can read",
+                        type=float,
+                        default=0.1)
+    parser.add_argument("--repeat",
+                        help="runs per case, each on a freshly generated archive with a cold cache",
+                        type=int,
+                        default=3)
+    parser.add_argument("-o", "--output",
+                        help="JSON file to save the results to",
+                        type=Path)
+    parser.add_argument("--compare",
+                        help="JSON results of an earlier run to compare against",
+                        type=Path)
+    parser.add_argument("--exiftool-workers",
+                        help="exiftool pool sizes of the exiftool_pool cases",
+                        type=int,
+                        nargs="+",
+                        default=[1, 2, 4, 8])
+    parser.add_argument("--real-exiftool",
+                        help="use the installed exiftool instead of the deterministic fake",
+                        action="store_true",
+                        default=False)
+    return parser
+
+
+def main() -> None:
+    arguments = construct_parser().parse_args()
+    workspace_root = Path(tempfile.mkdtemp(prefix="picstore-bench-"))
+    os.environ["XDG_CACHE_HOME"] = str(workspace_root / "cache")
+    os.environ["LOCALAPPDATA"] = str(workspace_root / "cache")
+    try:
+        _run(arguments=arguments, workspace_root=workspace_root)
+    finally:
+        from picstore.core import cache, pictype
+        cache.close()
+        pictype.terminate_exiftool()
+        shutil.rmtree(workspace_root, ignore_errors=True)
+
+
+def _run(arguments: Namespace, workspace_root: Path) -> None:
+    from picstore.config import config
+    from picstore.core import cache, pictype
+    from benchmarks import cases
+    from benchmarks.fake_exiftool import FakeExifToolHelper, install
+    if not arguments.real_exiftool:
+        install()
+    options = cases.Options(files_per_subdir=arguments.files,
+                            own_ratio=arguments.own_ratio,
+                            opaque_ratio=arguments.opaque_ratio)
+    available = cases.all_cases + cases.exiftool_pool_cases(workers=arguments.exiftool_workers)
+    selected = [case for case in available if arguments.cases is None or case.name in arguments.cases]
+    results = []
+    for case in selected:
+        for picdirs in arguments.picdirs:
+            durations = []
+            fetches = exiftool_files = 0
+            for run in range(arguments.repeat):
+                workspace = Path(tempfile.mkdtemp(prefix=f"{case.name}-{picdirs}-{run}-", dir=workspace_root))
+                pictype.set_exiftool_workers(workers=config.exiftool_workers)
+                function = case.setup(workspace, picdirs, options)
+                cache.rebuild()
+                pictype._models.clear()
+                pictype.metadata_fetches = 0
+                FakeExifToolHelper.reset()
+                with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                    start = time.perf_counter()
+                    function()
+                    durations.append(time.perf_counter() - start)
+                fetches = pictype.metadata_fetches
+                exiftool_files = FakeExifToolHelper.files
+            result = {
+                "case": case.name,
+                "picdirs": picdirs,
+                "runs": durations,
+                "min": min(durations),
+                "median": statistics.median(durations),
+                "metadata_fetches": fetches,
+                "exiftool_files": exiftool_files
+            }
+            if case.files is not None:
+                result["files"] = case.files(picdirs, options)
+                result["files_per_second"] = result["files"] / result["median"] if result["median"] > 0 else 0.0
+            results.append(result)
+            print(_format_row(result=result, baseline=_load_baseline(path=arguments.compare)), flush=True)
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "options": {**options._asdict(), "repeat": arguments.repeat, "real_exiftool": arguments.real_exiftool},
+        "results": results
+    }
+    if arguments.output is not None:
+        with open(arguments.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+        print(f"saved results to {arguments.output}")
+
+
+_baselines: Dict[Path, Dict] = {}
+
+
+def _load_baseline(path: Optional[Path]) -> Dict:
+    if path is None:
+        return {}
+    if path not in _baselines:
+        with open(path, "r") as fp:
+            results: List[Dict] = json.load(fp)["results"]
+        _baselines[path] = {(r["case"], r["picdirs"]): r for r in results}
+    return _baselines[path]
+
+
+def _format_row(result: Dict, baseline: Dict) -> str:
+    row = f"{result['case'].ljust(16)}   {str(result['picdirs']).rjust(6)} picdirs   " \
+          f"median {result['median']:9.4f}s   min {result['min']:9.4f}s   " \
+          f"fetches {str(result['metadata_fetches']).rjust(5)}   exiftool files {str(result['exiftool_files']).rjust(6)}"
+    if "files_per_second" in result:
+        row += f"   {result['files_per_second']:10.1f} files/s"
+    previous = baseline.get((result["case"], result["picdirs"]))
+    if previous is not None and previous["median"] > 0:
+        row += f"   x{result['median'] / previous['median']:.2f} vs baseline"
+    return row
+
+
+if __name__ == "__main__":
+    main()
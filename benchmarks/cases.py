@@ -0,0 +1,131 @@
+import datetime
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional, Sequence, Tuple
+from picstore.core import ParentDir, exif, pictype
+from picstore.commands import List, View
+from picstore.commands.repair import repair_all
+from picstore.config import config
+from benchmarks import synthetic
+
+
+class Options(NamedTuple):
+    files_per_subdir: int = 10
+    own_ratio: float = 0.8
+    opaque_ratio: float = 0.1
+    seed: int = 0
+
+
+Run = Callable[[], object]
+
+
+class Case(NamedTuple):
+    name: str
+    setup: Callable[[Path, int, Options], Run]
+    files: Optional[Callable[[int, Options], int]] = None
+
+
+def _parent_dir(workspace: Path, picdirs: int, options: Options) -> Path:
+    return synthetic.build_parent_dir(directory=workspace / "parent",
+                                      picdirs=picdirs,
+                                      files_per_subdir=options.files_per_subdir,
+                                      own_ratio=options.own_ratio,
+                                      opaque_ratio=options.opaque_ratio,
+                                      seed=options.seed)
+
+
+def _setup_parent_dir(workspace: Path, picdirs: int, options: Options) -> Run:
+    directory = _parent_dir(workspace=workspace, picdirs=picdirs, options=options)
+    return lambda: len(ParentDir(directory=directory).entries)
+
+
+def _setup_list(workspace: Path, picdirs: int, options: Options) -> Run:
+    directory = _parent_dir(workspace=workspace, picdirs=picdirs, options=options)
+    return lambda: List.list(directory=directory, sort=None, reverse=False)
+
+
+def _setup_list_fast(workspace: Path, picdirs: int, options: Options) -> Run:
+    directory = _parent_dir(workspace=workspace, picdirs=picdirs, options=options)
+    return lambda: List.list(directory=directory, sort=None, reverse=False, fast=True)
+
+
+def _setup_view(workspace: Path, picdirs: int, options: Options) -> Run:
+    directory = _parent_dir(workspace=workspace, picdirs=picdirs, options=options)
+    return lambda: View.view(directory=directory, name="picdir00000")
+
+
+def _setup_add(
+        copy: bool,
+        workers: int = config.transfer_workers,
+        prefilled: bool = False
+) -> Callable[[Path, int, Options], Run]:
+    def setup(workspace: Path, picdirs: int, options: Options) -> Run:
+        directory = _parent_dir(workspace=workspace, picdirs=picdirs, options=options)
+        source = synthetic.build_source(directory=workspace / "source",
+                                        pairs=picdirs * options.files_per_subdir,
+                                        own_ratio=options.own_ratio,
+                                        opaque_ratio=options.opaque_ratio,
+                                        seed=options.seed)
+        picdir = ParentDir(directory=directory).add(name="ingest", date=datetime.date(2030, 1, 1))
+        if prefilled:
+            data = synthetic.jpeg_bytes(model=synthetic.own_models[0]) + bytes(512)
+            for i in range(_source_files(picdirs=picdirs, options=options)):
+                (picdir.std.path / f"OLD_{i:06d}.JPG").write_bytes(data)
+        return lambda: picdir.add(directory=source, display_tqdm=False, copy=copy, workers=workers)
+    return setup
+
+
+def _setup_read_models(builtin: bool) -> Callable[[Path, int, Options], Run]:
+    def setup(workspace: Path, picdirs: int, options: Options) -> Run:
+        source = synthetic.build_source(directory=workspace / "source",
+                                        pairs=picdirs * options.files_per_subdir,
+                                        own_ratio=options.own_ratio,
+                                        seed=options.seed)
+        files = sorted(source.iterdir())
+        if builtin:
+            return lambda: [exif.read_model(path=file) for file in files]
+        return lambda: pictype.get_tags(files=files, tags="EXIF:Model")
+    return setup
+
+
+def _setup_exiftool_pool(workers: int) -> Callable[[Path, int, Options], Run]:
+    def setup(workspace: Path, picdirs: int, options: Options) -> Run:
+        source = synthetic.build_source(directory=workspace / "source",
+                                        pairs=picdirs * options.files_per_subdir,
+                                        own_ratio=options.own_ratio,
+                                        opaque_ratio=1.0,
+                                        seed=options.seed)
+        files = tuple(sorted(source.iterdir()))
+        pictype.set_exiftool_workers(workers=workers)
+        return lambda: pictype.get_models(paths=files)
+    return setup
+
+
+def exiftool_pool_cases(workers: Sequence[int]) -> Tuple[Case, ...]:
+    return tuple(Case(name=f"exiftool_pool_w{n}", setup=_setup_exiftool_pool(workers=n), files=_source_files)
+                 for n in workers)
+
+
+def _source_files(picdirs: int, options: Options) -> int:
+    return 2 * picdirs * options.files_per_subdir
+
+
+def _setup_repair_all(workspace: Path, picdirs: int, options: Options) -> Run:
+    directory = _parent_dir(workspace=workspace, picdirs=picdirs, options=options)
+    return lambda: repair_all(directory=directory)
+
+
+all_cases: Tuple[Case, ...] = (
+    Case(name="parent_dir", setup=_setup_parent_dir),
+    Case(name="list", setup=_setup_list),
+    Case(name="list_fast", setup=_setup_list_fast),
+    Case(name="view", setup=_setup_view),
+    Case(name="add_move", setup=_setup_add(copy=False), files=_source_files),
+    Case(name="add_copy", setup=_setup_add(copy=True), files=_source_files),
+    *(Case(name=f"add_{kind}_w{workers}", setup=_setup_add(copy=kind == "copy", workers=workers), files=_source_files)
+      for kind in ("move", "copy") for workers in (1, 4, 8)),
+    Case(name="add_into_empty", setup=_setup_add(copy=True), files=_source_files),
+    Case(name="add_into_full", setup=_setup_add(copy=True, prefilled=True), files=_source_files),
+    Case(name="repair_all", setup=_setup_repair_all),
+    Case(name="models_builtin", setup=_setup_read_models(builtin=True), files=_source_files),
+    Case(name="models_exiftool", setup=_setup_read_models(builtin=False), files=_source_files)
+)
@@ -0,0 +1,59 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+from picstore.core import exif, pictype
+from picstore.core.error import ExifParseError
+from benchmarks.synthetic import opaque_marker
+
+
+class FakeExifToolHelper:
+
+    spawns = 0
+    calls = 0
+    files = 0
+
+    def __init__(self):
+        FakeExifToolHelper.spawns += 1
+        self._running = True
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def terminate(self) -> None:
+        self._running = False
+
+    def get_tags(self, files: Sequence[str], tags: Union[str, List[str]]) -> List[Dict]:
+        FakeExifToolHelper.calls += 1
+        FakeExifToolHelper.files += len(files)
+        metadata = []
+        for file in files:
+            tags_of_file = {"SourceFile": file}
+            model = _read_model(path=Path(file))
+            if model is not None:
+                tags_of_file["EXIF:Model"] = model
+            metadata.append(tags_of_file)
+        return metadata
+
+    @staticmethod
+    def reset() -> None:
+        FakeExifToolHelper.spawns = 0
+        FakeExifToolHelper.calls = 0
+        FakeExifToolHelper.files = 0
+
+
+def install() -> None:
+    pictype.terminate_exiftool()
+    pictype._new_exiftool = FakeExifToolHelper
+
+
+def _read_model(path: Path) -> Optional[str]:
+    try:
+        return exif.read_model(path=path)
+    except ExifParseError:
+        pass
+    data = path.read_bytes()
+    start = data.find(opaque_marker)
+    if start < 0:
+        return None
+    start += len(opaque_marker)
+    return data[start:data.index(b"\0", start)].decode()
@@ -0,0 +1,67 @@
+import re
+import statistics
+import subprocess
+import sys
+from argparse import ArgumentParser
+from typing import Dict, List, Tuple
+
+
+_line_pattern = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def construct_parser() -> ArgumentParser:
+    parser = ArgumentParser(prog="python -m benchmarks.import_time",
+                            description="measure the import time of a picstore invocation with python -X importtime")
+    parser.add_argument("arguments",
+                        help="arguments passed to picstore",
+                        nargs="*",
+                        default=["list", "-h"])
+    parser.add_argument("--target-ms",
+                        help="fail if the median import time of picstore modules exceeds this",
+                        type=float,
+                        default=80.0)
+    parser.add_argument("--repeat",
+                        help="number of measured invocations",
+                        type=int,
+                        default=5)
+    parser.add_argument("--top",
+                        help="number of slowest modules to show",
+                        type=int,
+                        default=10)
+    return parser
+
+
+def measure(arguments: List[str]) -> Tuple[float, Dict[str, float]]:
+    process = subprocess.run([sys.executable, "-X", "importtime", "-m", "picstore", *arguments],
+                             stdout=subprocess.DEVNULL,
+                             stderr=subprocess.PIPE,
+                             text=True)
+    total_ms = 0.0
+    modules = {}
+    for line in process.stderr.splitlines():
+        match = _line_pattern.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, module = match.groups()
+        modules[module] = int(cumulative_us) / 1000
+        if len(indent) == 1 and module.split(".")[0] == "picstore":
+            total_ms += int(cumulative_us) / 1000
+    return total_ms, modules
+
+
+def main() -> None:
+    arguments = construct_parser().parse_args()
+    measurements = [measure(arguments=arguments.arguments) for _ in range(arguments.repeat)]
+    median_ms = statistics.median(map(lambda m: m[0], measurements))
+    slowest = sorted(measurements[-1][1].items(), key=lambda item: -item[1])[:arguments.top]
+    print(f"picstore {' '.join(arguments.arguments)}: {median_ms:.1f} ms importing picstore "
+          f"(median of {arguments.repeat}, target {arguments.target_ms:.1f} ms)")
+    for module, cumulative_ms in slowest:
+        print(f"\t{cumulative_ms:8.1f} ms   {module}")
+    if median_ms > arguments.target_ms:
+        print("import time target missed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
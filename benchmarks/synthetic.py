@@ -0,0 +1,119 @@
+import datetime
+import random
+import struct
+import zlib
+from pathlib import Path
+from typing import Sequence
+
+
+own_models = ("Canon EOS 77D", "Nokia 7 plus", "SZ-31MR")
+other_models = ("iPhone 12", "Pixel 6", "NIKON D750")
+opaque_marker = b"PICSTORE-MODEL:"
+
+_model_tag = 0x0110
+_ascii_type = 2
+
+
+def tiff_bytes(model: str, big_endian: bool = False) -> bytes:
+    endian = ">" if big_endian else "<"
+    value = model.encode() + b"\0"
+    header = (b"MM" if big_endian else b"II") + struct.pack(endian + "HI", 42, 8)
+    entry = struct.pack(endian + "HHI", _model_tag, _ascii_type, len(value))
+    if len(value) <= 4:
+        return header + struct.pack(endian + "H", 1) + entry + value.ljust(4, b"\0") + b"\0\0\0\0"
+    value_offset = 8 + 2 + 12 + 4
+    return header + struct.pack(endian + "H", 1) + entry + struct.pack(endian + "I", value_offset) + b"\0\0\0\0" + value
+
+
+def jpeg_bytes(model: str, app0: bool = False) -> bytes:
+    app1 = b"Exif\0\0" + tiff_bytes(model=model, big_endian=True)
+    segments = b"\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1
+    if app0:
+        jfif = b"JFIF\0\x01\x01\0\0\x01\0\x01\0\0"
+        segments = b"\xff\xe0" + struct.pack(">H", len(jfif) + 2) + jfif + segments
+    return b"\xff\xd8" + segments + b"\xff\xda\0\x02"
+
+
+def png_bytes(model: str) -> bytes:
+    chunks = [(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)),
+              (b"eXIf", tiff_bytes(model=model, big_endian=True)),
+              (b"IEND", b"")]
+    data = b"\x89PNG\r\n\x1a\n"
+    for chunk_type, chunk in chunks:
+        data += struct.pack(">I", len(chunk)) + chunk_type + chunk + struct.pack(">I", zlib.crc32(chunk_type + chunk))
+    return data
+
+
+def opaque_bytes(model: str) -> bytes:
+    return b"\0\0\0\0" + opaque_marker + model.encode() + b"\0"
+
+
+def write_pair(directory: Path, stem: str, model: str, padding: int = 1024, opaque: bool = False) -> None:
+    raw = opaque_bytes(model=model) if opaque else tiff_bytes(model=model)
+    std = opaque_bytes(model=model) if opaque else jpeg_bytes(model=model)
+    (directory / f"{stem}.CR2").write_bytes(raw + bytes(padding))
+    (directory / f"{stem}.JPG").write_bytes(std + bytes(padding // 2))
+
+
+def build_source(
+        directory: Path,
+        pairs: int,
+        own_ratio: float = 0.8,
+        opaque_ratio: float = 0.0,
+        seed: int = 0,
+        prefix: str = "IMG"
+) -> Path:
+    generator = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    for i in range(pairs):
+        models = own_models if generator.random() < own_ratio else other_models
+        write_pair(directory=directory,
+                   stem=f"{prefix}_{i:05d}",
+                   model=generator.choice(models),
+                   opaque=generator.random() < opaque_ratio)
+    return directory
+
+
+def build_parent_dir(
+        directory: Path,
+        picdirs: int,
+        files_per_subdir: int = 10,
+        own_ratio: float = 0.8,
+        opaque_ratio: float = 0.0,
+        seed: int = 0
+) -> Path:
+    generator = random.Random(seed)
+    directory.mkdir(parents=True, exist_ok=True)
+    first_date = datetime.date(2020, 1, 1)
+    for i in range(picdirs):
+        date = first_date + datetime.timedelta(days=i)
+        picdir = directory / f"{date.isoformat()}_picdir{i:05d}"
+        for name in ("STD", "RAW", "EXP", "LR", "OTHR"):
+            (picdir / name).mkdir(parents=True)
+        own_count = round(files_per_subdir * own_ratio)
+        _write_files(directory=picdir / "RAW", suffix=".CR2", count=own_count, models=own_models,
+                     opaque_ratio=opaque_ratio, generator=generator)
+        _write_files(directory=picdir / "STD", suffix=".JPG", count=own_count, models=own_models,
+                     opaque_ratio=opaque_ratio, generator=generator)
+        _write_files(directory=picdir / "OTHR", suffix=".JPG", count=files_per_subdir - own_count,
+                     models=other_models, opaque_ratio=opaque_ratio, generator=generator)
+    return directory
+
+
+def _write_files(
+        directory: Path,
+        suffix: str,
+        count: int,
+        models: Sequence[str],
+        opaque_ratio: float,
+        generator: random.Random
+) -> None:
+    for i in range(count):
+        model = generator.choice(models)
+        if generator.random() < opaque_ratio:
+            data = opaque_bytes(model=model)
+        elif suffix == ".CR2":
+            data = tiff_bytes(model=model)
+        else:
+            data = jpeg_bytes(model=model)
+        (directory / f"IMG_{i:05d}{suffix}").write_bytes(data + bytes(512))
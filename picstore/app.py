@@ -1,10 +1,31 @@
-from picstore import cli
+from picstore import cli, profiling
 
 
 def start() -> None:
     arguments = cli.parse()
+    from picstore.core import cache, pictype
     command_to_run = vars(arguments).pop("command")
+    no_cache = vars(arguments).pop("no_cache")
+    rebuild_cache = vars(arguments).pop("rebuild_cache")
+    pictype.set_exiftool_workers(workers=vars(arguments).pop("exiftool_workers"))
+    timings = vars(arguments).pop("timings")
+    profile_file = vars(arguments).pop("profile")
+    trace_file = vars(arguments).pop("trace")
+    cprofile_file = vars(arguments).pop("cprofile")
+    if timings or profile_file is not None or trace_file is not None:
+        profiling.enable()
+    if no_cache:
+        cache.disable()
+    elif rebuild_cache:
+        cache.rebuild()
     for command in cli.all_commands:
         if command_to_run == command.name:
-            command.run(arguments=arguments)
+            if cprofile_file is None:
+                command.load().run(arguments=arguments)
+            else:
+                import cProfile
+                profiler = cProfile.Profile()
+                profiler.runcall(command.load().run, arguments=arguments)
+                profiler.dump_stats(cprofile_file)
             break
+    profiling.report(timings=timings, json_file=profile_file, trace_file=trace_file)
@@ -1,6 +1,7 @@
 from argparse import ArgumentParser, Namespace, ArgumentDefaultsHelpFormatter
-from typing import Callable
-from picstore.commands import all_commands
+from pathlib import Path
+from picstore.commands import all_commands, CommandInfo
+from picstore.config import config
 
 
 program_name = "picstore"
@@ -15,12 +16,47 @@ class PicParser(ArgumentParser):
                                 prog=program_name,
                                 description=description,
                                 epilog=epilog)
+        self.add_argument("--no-cache",
+                          help="bypass the persistent metadata cache",
+                          action="store_true",
+                          default=False)
+        self.add_argument("--rebuild-cache",
+                          help="discard the persistent metadata cache and rebuild it",
+                          action="store_true",
+                          default=False)
+        self.add_argument("--exiftool-workers",
+                          help="number of exiftool processes used for metadata the built-in reader can't parse",
+                          type=int,
+                          default=config.exiftool_workers)
+        self.add_argument("--timings",
+                          help="print how long directory scans, metadata fetches, transfers and checks took",
+                          action="store_true",
+                          default=False)
+        self.add_argument("--profile",
+                          help="write phase timings as JSON to this file",
+                          type=Path,
+                          metavar="FILE")
+        self.add_argument("--trace",
+                          help="write phase timings as Chrome trace (chrome://tracing, Perfetto) to this file",
+                          type=Path,
+                          metavar="FILE")
+        self.add_argument("--cprofile",
+                          help="run the command under cProfile and write the stats to this file",
+                          type=Path,
+                          metavar="FILE")
 
 
 class CommandParser(ArgumentParser):
-    def __init__(self, parser_factory: Callable[[ArgumentParser, ], None], **kwargs):
+    def __init__(self, command: CommandInfo, **kwargs):
         ArgumentParser.__init__(self, **kwargs)
-        parser_factory(self)
+        self._command = command
+        self._constructed = False
+
+    def parse_known_args(self, args=None, namespace=None):
+        if not self._constructed:
+            self._constructed = True
+            self._command.load().construct_parser(self)
+        return ArgumentParser.parse_known_args(self, args, namespace)
 
 
 def construct_parser() -> PicParser:
@@ -30,7 +66,9 @@ def construct_parser() -> PicParser:
                                               dest="command")
     for command in all_commands:
         subparsers_action.add_parser(name=command.name,
-                                     parser_factory=command.construct_parser,
+                                     command=command,
+                                     help=command.help,
+                                     description=command.help,
                                      formatter_class=ArgumentDefaultsHelpFormatter)
     return parser
 
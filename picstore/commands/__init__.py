@@ -1,14 +1,38 @@
-from picstore.commands.add import Add
-from picstore.commands.create import Create
-from picstore.commands.list import List
-from picstore.commands.repair import Repair
-from picstore.commands.view import View
+from importlib import import_module
+from typing import NamedTuple, Type
+from picstore.commands.command import Command
+
+
+class CommandInfo(NamedTuple):
+    name: str
+    module: str
+    class_name: str
+    help: str
+
+    def load(self) -> Type[Command]:
+        return getattr(import_module(self.module), self.class_name)
 
 
 all_commands = [
-    Add,
-    Create,
-    List,
-    Repair,
-    View
+    CommandInfo(name="add", module="picstore.commands.add", class_name="Add",
+                help="add pictures to an existing picdir"),
+    CommandInfo(name="create", module="picstore.commands.create", class_name="Create",
+                help="create a new picdir"),
+    CommandInfo(name="dupes", module="picstore.commands.dupes", class_name="Dupes",
+                help="find duplicate pictures across picdirs"),
+    CommandInfo(name="list", module="picstore.commands.list", class_name="List",
+                help="list all picdirs"),
+    CommandInfo(name="repair", module="picstore.commands.repair", class_name="Repair",
+                help="repair picdirs"),
+    CommandInfo(name="view", module="picstore.commands.view", class_name="View",
+                help="show details on a picdir"),
+    CommandInfo(name="watch", module="picstore.commands.watch", class_name="Watch",
+                help="add new pictures to a picdir as soon as they appear in the sources")
 ]
+
+
+def __getattr__(name: str) -> Type[Command]:
+    for command in all_commands:
+        if command.class_name == name:
+            return command.load()
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
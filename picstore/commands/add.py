@@ -1,14 +1,14 @@
 from pathlib import Path
 from argparse import ArgumentParser, Namespace
 from datetime import datetime
-from typing import Optional
-from picstore.core import date_format, ParentDir, PicDirNotFoundError, PicDir
+from typing import Optional, List, Tuple
+from picstore.core import date_format, ParentDir, PicDirNotFoundError, PicDir, rules
+from picstore.core.error import InvalidRuleError, InsufficientSpaceError
 from picstore.commands.command import Command
 from picstore.config import config
 
 
 default_dir = Path(config.default_dir)
-sources = map(Path, config.default_sources)
 
 
 class Add(Command):
@@ -42,6 +42,29 @@ class Add(Command):
                                 help="specify to copy files (otherwise will move files)",
                                 action="store_true",
                                 default=False)
+        raw_parser.add_argument("-w", "--workers",
+                                help="number of files transferred in parallel",
+                                type=int,
+                                default=config.transfer_workers)
+        raw_parser.add_argument("--dedupe",
+                                help="skip files whose content already exists in the picdir",
+                                action="store_true",
+                                default=False)
+        raw_parser.add_argument("-o", "--owner",
+                                help="ownership rule for all files of the source, skipping EXIF for OWN, OTHR \
+                                      and SUFFIX (for own_suffixes and other_suffixes of config.json)",
+                                type=str.upper,
+                                choices=rules.rule_names)
+        raw_parser.add_argument("--owner-glob",
+                                help="ownership rule GLOB=RULE for matching files of the source (repeatable)",
+                                type=rules.parse_glob_rule,
+                                action="append",
+                                dest="owner_globs",
+                                metavar="GLOB=RULE")
+        raw_parser.add_argument("--resume",
+                                help="finish the transfers of an interrupted add (ignores all other source options)",
+                                action="store_true",
+                                default=False)
 
     @staticmethod
     def run(arguments: Namespace) -> None:
@@ -54,9 +77,13 @@ class Add(Command):
             date: Optional[datetime.date],
             source: Path,
             recursive: bool,
-            copy: bool
+            copy: bool,
+            workers: int,
+            dedupe: bool,
+            owner: Optional[str],
+            owner_globs: Optional[List[Tuple[str, str]]],
+            resume: bool = False
     ) -> None:
-        count = 0
         try:
             picdir = ParentDir(directory=directory).get(name=name, date=date)
         except NotADirectoryError:
@@ -66,19 +93,75 @@ class Add(Command):
             date_str = "any" if date is None else date.strftime(date_format)
             print(f"ERROR: PicDir with '{name}' and date '{date_str}' not found in {directory}")
             return
+        if resume:
+            count = picdir.resume(workers=workers)
+            print(f"resumed {count} files of an interrupted add to picdir in {picdir.path}:\n{picdir}")
+            return
+        Add.add_to(picdir=picdir,
+                   source=source,
+                   recursive=recursive,
+                   copy=copy,
+                   workers=workers,
+                   dedupe=dedupe,
+                   rule_spec=rules.command_spec(owner=owner, owner_globs=owner_globs))
+
+    @staticmethod
+    def add_to(
+            picdir: PicDir,
+            source: Optional[Path],
+            recursive: bool,
+            copy: bool,
+            workers: int,
+            dedupe: bool,
+            rule_spec: Optional[rules.RuleSpec] = None
+    ) -> None:
+        if len(picdir.pending_transfers()) > 0:
+            print(f"ERROR: An earlier add to {picdir.path} was interrupted, "
+                  f"finish it with 'picstore add {picdir.name} --resume' first")
+            return
+        count = 0
         if source is not None:
             print(f"adding files from {source}")
-            count = _add_single_dir(picdir=picdir, source=source, recursive=recursive, copy=copy)
+            count = _add_single_dir(picdir=picdir,
+                                    source=source,
+                                    recursive=recursive,
+                                    copy=copy,
+                                    workers=workers,
+                                    dedupe=dedupe,
+                                    rule_spec=rule_spec)
         else:
-            for default_source in sources:
+            for default_source in map(Path, config.default_sources):
                 print(f"adding files from {default_source}")
-                count += _add_single_dir(picdir=picdir, source=default_source, recursive=recursive, copy=copy)
+                count += _add_single_dir(picdir=picdir,
+                                         source=default_source,
+                                         recursive=recursive,
+                                         copy=copy,
+                                         workers=workers,
+                                         dedupe=dedupe,
+                                         rule_spec=rule_spec)
         print(f"added {count} files to picdir in {picdir.path}:\n{picdir}")
 
 
-def _add_single_dir(picdir: PicDir, source: Path, recursive: bool, copy: bool) -> int:
+def _add_single_dir(
+        picdir: PicDir,
+        source: Path,
+        recursive: bool,
+        copy: bool,
+        workers: int,
+        dedupe: bool,
+        rule_spec: Optional[rules.RuleSpec]
+) -> int:
     try:
-        return picdir.add(directory=source, recursive=recursive, copy=copy)
+        rule = rules.source_rule(source=source, spec=rule_spec)
+    except InvalidRuleError as e:
+        print(f"ERROR: Cannot add from {source} since '{e.rule}' is no valid ownership rule")
+        return 0
+    try:
+        return picdir.add(directory=source, recursive=recursive, copy=copy, workers=workers, dedupe=dedupe, rule=rule)
     except NotADirectoryError:
         print(f"ERROR: Cannot add from {source} since its no directory")
         return 0
+    except InsufficientSpaceError as e:
+        print(f"ERROR: Cannot add from {source} since it needs {e.required / 1e6:.1f} MB "
+              f"but only {e.available / 1e6:.1f} MB are free")
+        return 0
@@ -1,15 +1,14 @@
 from pathlib import Path
 import datetime
 from argparse import ArgumentParser, Namespace
-from typing import Optional
-from picstore.core import ParentDir, date_format, PicDirDuplicateError
+from typing import Optional, List, Tuple
+from picstore.core import ParentDir, date_format, PicDirDuplicateError, rules
 from picstore.config import config
 from picstore.commands.command import Command
 from picstore.commands import Add
 
 
 default_dir = Path(config.default_dir)
-sources = map(Path, config.default_sources)
 
 
 class Create(Command):
@@ -48,6 +47,25 @@ class Create(Command):
                                 help="specify to copy files (otherwise will move files)",
                                 action="store_true",
                                 default=False)
+        raw_parser.add_argument("-w", "--workers",
+                                help="number of files transferred in parallel",
+                                type=int,
+                                default=config.transfer_workers)
+        raw_parser.add_argument("--dedupe",
+                                help="skip files whose content already exists in the picdir",
+                                action="store_true",
+                                default=False)
+        raw_parser.add_argument("-o", "--owner",
+                                help="ownership rule for all files of the source, skipping EXIF for OWN, OTHR \
+                                      and SUFFIX (for own_suffixes and other_suffixes of config.json)",
+                                type=str.upper,
+                                choices=rules.rule_names)
+        raw_parser.add_argument("--owner-glob",
+                                help="ownership rule GLOB=RULE for matching files of the source (repeatable)",
+                                type=rules.parse_glob_rule,
+                                action="append",
+                                dest="owner_globs",
+                                metavar="GLOB=RULE")
 
     @staticmethod
     def run(arguments: Namespace) -> None:
@@ -61,7 +79,11 @@ class Create(Command):
             source: Optional[Path],
             bare: bool,
             recursive: bool,
-            copy: bool
+            copy: bool,
+            workers: int,
+            dedupe: bool,
+            owner: Optional[str],
+            owner_globs: Optional[List[Tuple[str, str]]]
     ) -> None:
         try:
             picdir = ParentDir(directory=directory).add(name=name, date=date)
@@ -75,9 +97,10 @@ class Create(Command):
         if bare:
             print(picdir)
         else:
-            Add.add(directory=directory,
-                    name=name,
-                    date=date,
-                    source=source,
-                    recursive=recursive,
-                    copy=copy)
+            Add.add_to(picdir=picdir,
+                       source=source,
+                       recursive=recursive,
+                       copy=copy,
+                       workers=workers,
+                       dedupe=dedupe,
+                       rule_spec=rules.command_spec(owner=owner, owner_globs=owner_globs))
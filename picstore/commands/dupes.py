@@ -0,0 +1,157 @@
+import json
+import os
+import sqlite3
+import tempfile
+from argparse import ArgumentParser, Namespace
+from itertools import groupby
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Generator, List, Literal, Optional, Tuple
+from picstore.core import ParentDir, hashing
+from picstore.config import config
+from picstore.commands.command import Command
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+
+default_dir = Path(config.default_dir)
+
+_sub_directories = ("RAW", "STD", "OTHR")
+_batch_size = 1024
+
+
+class Dupes(Command):
+
+    name = "dupes"
+
+    def __init__(self):
+        Command.__init__(self)
+
+    @staticmethod
+    def construct_parser(raw_parser: ArgumentParser) -> None:
+        raw_parser.add_argument("-dir",
+                                help=f"dir in which to search all picdirs for duplicates",
+                                type=Path,
+                                dest="directory",
+                                default=default_dir)
+        raw_parser.add_argument("-f", "--format",
+                                help="output format",
+                                choices=["table", "ndjson"],
+                                dest="output_format",
+                                default="table")
+        raw_parser.add_argument("-j", "--jobs",
+                                help="number of processes used for hashing",
+                                type=int,
+                                default=os.cpu_count())
+
+    @staticmethod
+    def run(arguments: Namespace) -> None:
+        Dupes.dupes(**vars(arguments))
+
+    @staticmethod
+    def dupes(directory: Path, output_format: Literal["table", "ndjson"], jobs: int) -> None:
+        from concurrent.futures import ProcessPoolExecutor
+        from colorama import Style
+        try:
+            parent_dir = ParentDir(directory=directory)
+        except NotADirectoryError:
+            print(f"ERROR: Cannot search PicDirs in {directory} since its no directory")
+            return
+        if output_format == "table":
+            print(f"{Style.BRIGHT}{'hash'.ljust(16)}   {'size'.ljust(12)}   path{Style.RESET_ALL}")
+        group_count = 0
+        with tempfile.TemporaryDirectory() as temp_dir, ProcessPoolExecutor(max_workers=max(1, jobs)) as pool:
+            database = sqlite3.connect(Path(temp_dir) / "files.sqlite")
+            database.execute("CREATE TABLE files (size INTEGER NOT NULL, path TEXT NOT NULL)")
+            for picdir_path in map(lambda e: e.path, parent_dir.entries):
+                database.executemany("INSERT INTO files (size, path) VALUES (?, ?)", _scan_picdir(path=picdir_path))
+            database.commit()
+            database.execute("CREATE INDEX files_size ON files (size)")
+            for size, digest, paths in _duplicate_groups(database=database, pool=pool):
+                group_count += 1
+                if output_format == "ndjson":
+                    print(json.dumps({"size": size, "hash": digest, "paths": list(map(str, paths))}), flush=True)
+                else:
+                    for path in paths:
+                        print(f"{digest[:16]}   {str(size).ljust(12)}   {path}")
+                    print(flush=True)
+            database.close()
+        if output_format == "table":
+            print(f"found {group_count} groups of duplicates in {directory}")
+
+
+def _scan_picdir(path: Path) -> Generator[Tuple[int, str], None, None]:
+    for sub_directory in _sub_directories:
+        try:
+            with os.scandir(path / sub_directory) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        yield entry.stat().st_size, entry.path
+        except OSError:
+            continue
+
+
+def _size_groups(database: sqlite3.Connection) -> Generator[Tuple[int, List[Path]], None, None]:
+    sizes = database.execute("SELECT size FROM files GROUP BY size HAVING COUNT(*) > 1 ORDER BY size")
+    for (size, ) in sizes:
+        rows = database.execute("SELECT path FROM files WHERE size = ?", (size, ))
+        yield size, list(map(lambda r: Path(r[0]), rows))
+
+
+def _batches(database: sqlite3.Connection) -> Generator[List[Tuple[int, List[Path]]], None, None]:
+    batch = []
+    batch_length = 0
+    for size, paths in _size_groups(database=database):
+        batch.append((size, paths))
+        batch_length += len(paths)
+        if batch_length >= _batch_size:
+            yield batch
+            batch = []
+            batch_length = 0
+    if len(batch) > 0:
+        yield batch
+
+
+def _duplicate_groups(
+        database: sqlite3.Connection,
+        pool: "ProcessPoolExecutor"
+) -> Generator[Tuple[int, str, List[Path]], None, None]:
+    for batch in _batches(database=database):
+        paths = [path for _, group in batch for path in group]
+        partial_hashes = dict(zip(paths, pool.map(_partial_hash, paths, chunksize=16)))
+        candidates = []
+        for size, group in batch:
+            candidates.extend(_group_by_hash(size=size, paths=group, hashes=partial_hashes))
+        to_confirm = [path for size, _, group in candidates if hashing.needs_full_hash(size=size) for path in group]
+        full_hashes = dict(zip(to_confirm, pool.map(_full_hash, to_confirm, chunksize=4)))
+        for size, partial_digest, group in candidates:
+            if not hashing.needs_full_hash(size=size):
+                yield size, partial_digest, group
+                continue
+            yield from _group_by_hash(size=size, paths=group, hashes=full_hashes)
+
+
+def _group_by_hash(
+        size: int,
+        paths: List[Path],
+        hashes: Dict[Path, Optional[str]]
+) -> Generator[Tuple[int, str, List[Path]], None, None]:
+    hashed = sorted(filter(lambda p: hashes[p] is not None, paths), key=lambda p: hashes[p])
+    for digest, group in groupby(hashed, key=lambda p: hashes[p]):
+        group = list(group)
+        if len(group) > 1:
+            yield size, digest, group
+
+
+def _partial_hash(path: Path) -> Optional[str]:
+    try:
+        return hashing.partial_hash(path=path)
+    except OSError:
+        return None
+
+
+def _full_hash(path: Path) -> Optional[str]:
+    try:
+        return hashing.full_hash(path=path)
+    except OSError:
+        return None
@@ -1,13 +1,15 @@
 from argparse import ArgumentParser, Namespace
-from typing import Literal, Optional
+from typing import Literal, Optional, Sequence
 from pathlib import Path
-from picstore.core import PicDir, ParentDir
+from picstore.core import PicDir, ParentDir, PicDirEntry, PicDirSummary
 from picstore.config import config
 from picstore.commands.command import Command
 
 
 default_dir = Path(config.default_dir)
 
+_prefetch_group_size = 32
+
 
 class List(Command):
 
@@ -30,6 +32,10 @@ class List(Command):
                                 help="reverse the order of the displayed list",
                                 action="store_true",
                                 default=False)
+        raw_parser.add_argument("-f", "--fast",
+                                help="count pictures by suffix and cached metadata only (no new EXIF reads)",
+                                action="store_true",
+                                default=False)
 
     @staticmethod
     def run(arguments: Namespace) -> None:
@@ -39,15 +45,45 @@ class List(Command):
     def list(
             directory: Path,
             sort: Optional[Literal["date", "name", "raw", "std"]],
-            reverse: bool
+            reverse: bool,
+            fast: bool = False
     ) -> None:
         try:
-            picdirs = ParentDir(directory=directory)
+            parent_dir = ParentDir(directory=directory)
         except NotADirectoryError:
             print(f"ERROR: Cannot list Picdirs in {directory} since its no directory")
             return
-        if sort is not None:
-            picdirs.sort(attribute=sort)
+        entries = list(parent_dir.entries)
+        summaries = {}
+        if sort == "name":
+            entries.sort(key=lambda e: e.name)
+        elif sort == "date":
+            entries.sort(key=lambda e: e.date)
+        elif sort in ("raw", "std"):
+            if not fast:
+                parent_dir.prefetch(entries=_stale_entries(entries=entries))
+            summaries = {entry.path: _summarize(entry=entry, fast=fast) for entry in entries}
+            if sort == "raw":
+                entries.sort(key=lambda e: summaries[e.path].raw_count)
+            else:
+                entries.sort(key=lambda e: summaries[e.path].std_count)
         if reverse:
-            picdirs = reversed(picdirs)
-        print(f"{PicDir.table_header()}\n" + "\n".join(map(str, picdirs)))
+            entries.reverse()
+        print(PicDir.table_header(), flush=True)
+        for start in range(0, len(entries), _prefetch_group_size):
+            group = entries[start:start + _prefetch_group_size]
+            if not fast and len(summaries) == 0:
+                parent_dir.prefetch(entries=_stale_entries(entries=group))
+            for entry in group:
+                summary = summaries[entry.path] if entry.path in summaries else _summarize(entry=entry, fast=fast)
+                print(PicDir.table_row(summary=summary), flush=True)
+
+
+def _stale_entries(entries: Sequence[PicDirEntry]) -> Sequence[PicDirEntry]:
+    return list(filter(lambda e: e.picdir.load_state() is None, entries))
+
+
+def _summarize(entry: PicDirEntry, fast: bool) -> PicDirSummary:
+    if fast:
+        return entry.picdir.fast_summary()
+    return entry.picdir.summary()
@@ -1,9 +1,8 @@
 from argparse import ArgumentParser, Namespace
 from pathlib import Path
-from typing import Union
-from picstore.core import PicDir, ParentDir
+from typing import Union, Tuple, List
+from picstore.core import PicDir, PicDirSummary
 from picstore.config import config
-from picstore.commands.list import List
 from picstore.commands.view import View
 from picstore.commands.command import Command
 
@@ -29,6 +28,14 @@ class Repair(Command):
                                 help="indicate that 'dir' argument points to a picdir",
                                 action="store_true",
                                 default=False)
+        raw_parser.add_argument("-j", "--jobs",
+                                help="number of picdirs repaired in parallel",
+                                type=int,
+                                default=1)
+        raw_parser.add_argument("--full",
+                                help="audit every picdir, even those that did not change since the last repair",
+                                action="store_true",
+                                default=False)
 
     @staticmethod
     def run(arguments: Namespace) -> None:
@@ -37,19 +44,20 @@ class Repair(Command):
     @staticmethod
     def repair(
             directory: Path,
-            single: bool
+            single: bool,
+            jobs: int,
+            full: bool
     ) -> None:
         if not single:
-            try:
-                parent_picdir = ParentDir(directory=directory)
-            except NotADirectoryError:
+            if not directory.is_dir():
                 print(f"ERROR: Cannot repair PicDirs in {directory} since its no directory")
                 return
-            if repair_all(parent_picdir=parent_picdir):
+            repaired_all, summaries = repair_all(directory=directory, jobs=jobs, full=full)
+            if repaired_all:
                 print(f"repaired all picdirs in {directory}:")
             else:
                 print(f"couldn't repair all picdirs in {directory}:")
-            List.list(directory=directory, sort=None, reverse=False)
+            print(f"{PicDir.table_header()}\n" + "\n".join(map(PicDir.table_row, summaries)))
         else:
             repaired = _repair_single(directory=directory)
             if repaired is None or not repaired.is_intact():
@@ -59,19 +67,40 @@ class Repair(Command):
                 View.view(directory=repaired.path.parent, name=repaired.name, date=repaired.date)
 
 
-def repair_all(parent_picdir: ParentDir) -> bool:
+def repair_all(directory: Path, jobs: int = 1, full: bool = False) -> Tuple[bool, List[PicDirSummary]]:
     repaired_all = True
-    for directory in parent_picdir.path.iterdir():
-        if directory.is_dir():
-            repaired = _repair_single(directory=directory)
-            if repaired is None:
+    prepared = []
+    for sub_directory in directory.iterdir():
+        if sub_directory.is_dir():
+            prepared_directory = _prepare_single(directory=sub_directory)
+            if prepared_directory is None:
                 repaired_all = False
             else:
-                repaired_all = repaired_all and repaired.is_intact()
-    return repaired_all
+                prepared.append(prepared_directory)
+    if jobs <= 1:
+        summaries = list(map(lambda d: _repair_prepared(directory=d, full=full), prepared))
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        from tqdm import tqdm
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = pool.map(_repair_prepared, prepared, [False] * len(prepared), [full] * len(prepared))
+            summaries = list(tqdm(results, desc="repairing", unit="picdirs", total=len(prepared)))
+    repaired_all = repaired_all and all(map(lambda s: s.intact, summaries))
+    return repaired_all, summaries
 
 
 def _repair_single(directory: Path) -> Union[PicDir, None]:
+    prepared_directory = _prepare_single(directory=directory)
+    if prepared_directory is None:
+        return None
+    picdir = PicDir(path_or_parent=prepared_directory)
+    if len(picdir.pending_transfers()) > 0:
+        picdir.resume()
+    picdir.add(directory=picdir.path)
+    return picdir
+
+
+def _prepare_single(directory: Path) -> Union[Path, None]:
     try:
         correct_name = PicDir.is_name_correct(directory=directory)
     except NotADirectoryError:
@@ -85,6 +114,16 @@ def _repair_single(directory: Path) -> Union[PicDir, None]:
         PicDir.create_required_directories(directory=directory)
         if not PicDir.required_directories_exist(directory=directory):
             return None
+    return directory
+
+
+def _repair_prepared(directory: Path, display_tqdm: bool = True, full: bool = False) -> PicDirSummary:
     picdir = PicDir(path_or_parent=directory)
-    picdir.add(directory=picdir.path)
-    return picdir
+    if len(picdir.pending_transfers()) > 0:
+        picdir.resume()
+    if not full:
+        state = picdir.load_state()
+        if state is not None and state.audited_by_repair:
+            return state
+    picdir.add(directory=picdir.path, display_tqdm=display_tqdm)
+    return picdir.audit()
@@ -2,7 +2,6 @@ from argparse import ArgumentParser, Namespace
 from datetime import datetime
 from typing import Collection, Optional
 from pathlib import Path
-from colorama import Style, Fore
 from picstore.core import ParentDir, date_format, PicDirNotFoundError
 from picstore.config import config
 from picstore.commands.command import Command
@@ -37,6 +36,7 @@ class View(Command):
 
     @staticmethod
     def view(directory: Path, name: str, date: Optional[datetime.date] = None) -> None:
+        from colorama import Style, Fore
         try:
             picdir = ParentDir(directory=directory).get(name=name, date=date)
         except NotADirectoryError:
@@ -46,14 +46,16 @@ class View(Command):
             date_str = "any" if date is None else date.strftime(date_format)
             print(f"ERROR: PicDir with name '{name}' and date '{date_str}' not found in {directory}")
             return
-        title = f"Information on PicDir '{picdir.name}':"
+        picdir.prefetch()
+        summary = picdir.summary()
+        title = f"Information on PicDir '{summary.name}':"
         print(f"{Style.BRIGHT}{title}{Style.RESET_ALL}" + "\n" + "-" * len(title))
-        print(f"{'Name:'.ljust(10)}{picdir.name}")
-        print(f"{'Date:'.ljust(10)}{picdir.date.strftime(date_format)}")
-        print(f"{'#RAW:'.ljust(10)}{picdir.raw_count}")
-        print(f"{'#STD:'.ljust(10)}{picdir.std_count}")
-        print(f"{'Path:'.ljust(10)}{picdir.path}")
-        if picdir.is_intact():
+        print(f"{'Name:'.ljust(10)}{summary.name}")
+        print(f"{'Date:'.ljust(10)}{summary.date.strftime(date_format)}")
+        print(f"{'#RAW:'.ljust(10)}{summary.raw_count}")
+        print(f"{'#STD:'.ljust(10)}{summary.std_count}")
+        print(f"{'Path:'.ljust(10)}{summary.path}")
+        if summary.intact:
             print(f"{'Status:'.ljust(10)}{Fore.GREEN}ok{Style.RESET_ALL}")
         else:
             print(f"{'Status:'.ljust(10)}{Fore.RED}bad{Style.RESET_ALL}")
@@ -64,6 +66,7 @@ class View(Command):
         _print_files(description=f"Wrong owner in {picdir.raw.path}:", files=picdir.raw.get_invalid_owner_content())
         _print_files(description=f"Wrong owner in {picdir.std.path}:", files=picdir.std.get_invalid_owner_content())
         _print_files(description=f"Wrong owner in {picdir.other.path}:", files=picdir.other.get_invalid_owner_content())
+        _print_files(description=f"Without RAW/STD counterpart in {picdir.path}:", files=picdir.orphans())
 
 
 def _print_files(description: str, files: Collection[Path]) -> None:
@@ -0,0 +1,216 @@
+import signal
+import sys
+import threading
+import time
+from argparse import ArgumentParser, Namespace
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from picstore.core import date_format, ParentDir, PicDirNotFoundError, PicDir, rules, watcher
+from picstore.core.error import InvalidRuleError, InsufficientSpaceError
+from picstore.core.rules import OwnerRule
+from picstore.commands.command import Command
+from picstore.config import config
+
+
+default_dir = Path(config.default_dir)
+
+_inotify_timeout = 0.5
+
+
+class Watch(Command):
+
+    name = "watch"
+
+    def __init__(self):
+        Command.__init__(self)
+
+    @staticmethod
+    def construct_parser(raw_parser: ArgumentParser) -> None:
+        raw_parser.add_argument("name",
+                                help="name of the picdir")
+        raw_parser.add_argument("-dir",
+                                help=f"dir in which to search for the picdir",
+                                type=Path,
+                                dest="directory",
+                                default=default_dir)
+        raw_parser.add_argument("-d", "--date",
+                                help="the date (YYYY-MM-DD) of the picdir",
+                                type=lambda s: datetime.strptime(s, date_format))
+        raw_parser.add_argument("-s", "--source",
+                                help="directory to watch for new pictures (repeatable, \
+                                      watches the paths in config.json if omitted)",
+                                type=Path,
+                                action="append")
+        raw_parser.add_argument("-r", "--recursive",
+                                help="also watch sub directories of the sources",
+                                action="store_true",
+                                default=False)
+        raw_parser.add_argument("-c", "--copy",
+                                help="specify to copy files (otherwise will move files)",
+                                action="store_true",
+                                default=False)
+        raw_parser.add_argument("-w", "--workers",
+                                help="number of files transferred in parallel",
+                                type=int,
+                                default=config.transfer_workers)
+        raw_parser.add_argument("--dedupe",
+                                help="skip files whose content already exists in the picdir",
+                                action="store_true",
+                                default=False)
+        raw_parser.add_argument("-o", "--owner",
+                                help="ownership rule for all files of the sources (see 'add -h')",
+                                type=str.upper,
+                                choices=rules.rule_names)
+        raw_parser.add_argument("--owner-glob",
+                                help="ownership rule GLOB=RULE for matching files of the sources (repeatable)",
+                                type=rules.parse_glob_rule,
+                                action="append",
+                                dest="owner_globs",
+                                metavar="GLOB=RULE")
+        raw_parser.add_argument("--settle",
+                                help="seconds a new file must stay unchanged before it is added",
+                                type=float,
+                                default=config.watch_settle_seconds)
+        raw_parser.add_argument("--batch-size",
+                                help="maximum number of files added at once",
+                                type=int,
+                                default=config.watch_batch_size)
+        raw_parser.add_argument("--poll",
+                                help="poll the sources every INTERVAL seconds instead of using inotify",
+                                type=float,
+                                metavar="INTERVAL")
+
+    @staticmethod
+    def run(arguments: Namespace) -> None:
+        Watch.watch(**vars(arguments))
+
+    @staticmethod
+    def watch(
+            directory: Path,
+            name: str,
+            date: Optional[datetime.date],
+            source: Optional[List[Path]],
+            recursive: bool,
+            copy: bool,
+            workers: int,
+            dedupe: bool,
+            owner: Optional[str],
+            owner_globs: Optional[List[Tuple[str, str]]],
+            settle: float,
+            batch_size: int,
+            poll: Optional[float]
+    ) -> None:
+        try:
+            picdir = ParentDir(directory=directory).get(name=name, date=date)
+        except NotADirectoryError:
+            print(f"ERROR: Cannot watch for a PicDir in {directory} since its no directory")
+            return
+        except PicDirNotFoundError:
+            date_str = "any" if date is None else date.strftime(date_format)
+            print(f"ERROR: PicDir with '{name}' and date '{date_str}' not found in {directory}")
+            return
+        if len(picdir.pending_transfers()) > 0:
+            print(f"ERROR: An earlier add to {picdir.path} was interrupted, "
+                  f"finish it with 'picstore add {picdir.name} --resume' first")
+            return
+        sources = source if source is not None else list(map(Path, config.default_sources))
+        for directory_to_watch in sources:
+            if not directory_to_watch.is_dir():
+                print(f"ERROR: Cannot watch {directory_to_watch} since its no directory")
+                return
+        spec = rules.command_spec(owner=owner, owner_globs=owner_globs)
+        try:
+            source_rules = {s: rules.source_rule(source=s, spec=spec) for s in sources}
+        except InvalidRuleError as e:
+            print(f"ERROR: Cannot watch since '{e.rule}' is no valid ownership rule")
+            return
+        stop = threading.Event()
+        previous_handlers = {s: signal.signal(s, lambda *_: stop.set()) for s in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            count = _watch_loop(picdir=picdir,
+                                source_rules=source_rules,
+                                recursive=recursive,
+                                copy=copy,
+                                workers=workers,
+                                dedupe=dedupe,
+                                debouncer=watcher.Debouncer(settle_seconds=settle, batch_size=batch_size),
+                                poll=poll,
+                                stop=stop)
+        finally:
+            for signal_number, handler in previous_handlers.items():
+                signal.signal(signal_number, handler)
+        print(f"added {count} files to picdir in {picdir.path}:\n{picdir}")
+
+
+def _watch_loop(
+        picdir: PicDir,
+        source_rules: Dict[Path, Optional[OwnerRule]],
+        recursive: bool,
+        copy: bool,
+        workers: int,
+        dedupe: bool,
+        debouncer: watcher.Debouncer,
+        poll: Optional[float],
+        stop: threading.Event
+) -> int:
+    count = 0
+    start = time.monotonic()
+    with watcher.create_watcher(directories=source_rules.keys(), recursive=recursive, polling=poll is not None) \
+            as file_watcher:
+        kind = "inotify" if isinstance(file_watcher, watcher.InotifyWatcher) else "polling"
+        print(f"watching {', '.join(map(str, source_rules.keys()))} ({kind}), stop with Ctrl-C")
+        while not stop.is_set():
+            debouncer.add(paths=file_watcher.poll(timeout=_inotify_timeout if poll is None else poll))
+            batch = debouncer.ready()
+            if len(batch) > 0:
+                count += _add_batch(picdir=picdir,
+                                    batch=batch,
+                                    source_rules=source_rules,
+                                    copy=copy,
+                                    workers=workers,
+                                    dedupe=dedupe)
+            _print_status(pending=len(debouncer), count=count, elapsed=time.monotonic() - start)
+    print(file=sys.stderr)
+    if len(debouncer) > 0:
+        print(f"stopped with {len(debouncer)} files still settling, they remain in the sources")
+    return count
+
+
+def _add_batch(
+        picdir: PicDir,
+        batch: List[Path],
+        source_rules: Dict[Path, Optional[OwnerRule]],
+        copy: bool,
+        workers: int,
+        dedupe: bool
+) -> int:
+    by_source: Dict[Path, List[Path]] = {}
+    for file in batch:
+        by_source.setdefault(_source_of(file=file, sources=source_rules.keys()), []).append(file)
+    count = 0
+    for source, files in by_source.items():
+        try:
+            picdir.check_free_space(files=files, copy=copy)
+            count += picdir.add_files(files=files,
+                                      display_tqdm=False,
+                                      copy=copy,
+                                      workers=workers,
+                                      dedupe=dedupe,
+                                      description=f"adding {source.name}",
+                                      rule=source_rules[source])
+        except InsufficientSpaceError as e:
+            print(f"\nERROR: Cannot add {len(files)} files from {source} since they need {e.required / 1e6:.1f} MB "
+                  f"but only {e.available / 1e6:.1f} MB are free")
+    return count
+
+
+def _source_of(file: Path, sources) -> Path:
+    matching = filter(lambda s: s in file.parents, sources)
+    return max(matching, key=lambda s: len(s.parts))
+
+
+def _print_status(pending: int, count: int, elapsed: float) -> None:
+    rate = count / elapsed if elapsed > 0 else 0.0
+    status = f"pending {pending}   added {count} files   {rate:.2f} files/s"
+    print(f"\r{status.ljust(60)}", end="", file=sys.stderr, flush=True)
@@ -1,8 +1,32 @@
-from json_sett import Settings
+import json
+import threading
 from pathlib import Path
+from typing import Any, Dict, Optional
 
 
 _config_file = Path(__file__).parent / "data" / "config.json"
 
 
+class Settings:
+    def __init__(self, file: Path):
+        self._file = file
+        self._values: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._values is None:
+                with open(self._file, "r") as fp:
+                    self._values = json.load(fp)
+        return self._values
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self._load()[name]
+        except KeyError:
+            raise AttributeError(f"'{name}' is not set in {self._file}") from None
+
+
 config = Settings(file=_config_file)
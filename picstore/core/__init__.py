@@ -1,3 +1,3 @@
-from picstore.core.picdir import PicDir, date_format
-from picstore.core.parentdir import ParentDir
+from picstore.core.picdir import PicDir, PicDirSummary, date_format
+from picstore.core.parentdir import ParentDir, PicDirEntry
 from picstore.core.error import PicDirNotFoundError, PicDirDuplicateError, MissingSubDirError, NotASubDirError
@@ -0,0 +1,237 @@
+import atexit
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+from picstore import profiling
+from picstore.config import config
+
+
+_schema = """
+CREATE TABLE IF NOT EXISTS models (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    model TEXT,
+    accessed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    partial TEXT,
+    full TEXT,
+    accessed INTEGER NOT NULL
+);
+"""
+_tables = ("models", "hashes")
+_hash_kinds = ("partial", "full")
+
+
+def default_cache_file() -> Path:
+    if sys.platform == "win32" and "LOCALAPPDATA" in os.environ:
+        cache_dir = Path(os.environ["LOCALAPPDATA"])
+    elif "XDG_CACHE_HOME" in os.environ:
+        cache_dir = Path(os.environ["XDG_CACHE_HOME"])
+    else:
+        cache_dir = Path.home() / ".cache"
+    return cache_dir / "picstore" / "cache.sqlite"
+
+
+def file_key(path: Path) -> Optional[Tuple[str, int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return str(path.absolute()), stat.st_size, stat.st_mtime_ns
+
+
+class MetadataCache:
+    def __init__(self, file: Path, max_entries: int):
+        self._file = file
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pid = os.getpid()
+        self._hits = 0
+        self._misses = 0
+        self._row_estimates: Dict[str, int] = {}
+
+    @property
+    def file(self) -> Path:
+        return self._file
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def _count_hit(self) -> None:
+        self._hits += 1
+        profiling.count(name="cache hits")
+
+    def _count_miss(self) -> None:
+        self._misses += 1
+        profiling.count(name="cache misses")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._connection = None
+            self._row_estimates = {}
+            self._pid = os.getpid()
+        if self._connection is None:
+            self._file.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self._file, timeout=30, check_same_thread=False)
+            self._connection.executescript(_schema)
+        return self._connection
+
+    def get_models(self, paths: Iterable[Path]) -> Dict[Path, Optional[str]]:
+        models = {}
+        now = time.time_ns()
+        with self._lock:
+            connection = self._connect()
+            touched = []
+            for path in paths:
+                key = file_key(path=path)
+                row = None
+                if key is not None:
+                    row = connection.execute("SELECT size, mtime_ns, model FROM models WHERE path = ?",
+                                             (key[0], )).fetchone()
+                if row is None or (row[0], row[1]) != key[1:]:
+                    self._count_miss()
+                    continue
+                self._count_hit()
+                models[path] = row[2]
+                touched.append((now, key[0]))
+            connection.executemany("UPDATE models SET accessed = ? WHERE path = ?", touched)
+            connection.commit()
+        return models
+
+    def set_models(self, models: Dict[Path, Optional[str]]) -> None:
+        now = time.time_ns()
+        rows = []
+        for path, model in models.items():
+            key = file_key(path=path)
+            if key is not None:
+                rows.append((*key, model, now))
+        with self._lock:
+            connection = self._connect()
+            connection.executemany("INSERT OR REPLACE INTO models (path, size, mtime_ns, model, accessed) "
+                                   "VALUES (?, ?, ?, ?, ?)", rows)
+            connection.commit()
+            self._evict_if_full(connection=connection, table="models", added=len(rows))
+
+    def get_hash(self, path: Path, kind: str) -> Optional[str]:
+        if kind not in _hash_kinds:
+            raise ValueError(f"unknown hash kind '{kind}'")
+        key = file_key(path=path)
+        if key is None:
+            return None
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(f"SELECT size, mtime_ns, {kind} FROM hashes WHERE path = ?",
+                                     (key[0], )).fetchone()
+            if row is None or (row[0], row[1]) != key[1:] or row[2] is None:
+                self._count_miss()
+                return None
+            self._count_hit()
+            connection.execute("UPDATE hashes SET accessed = ? WHERE path = ?", (time.time_ns(), key[0]))
+            connection.commit()
+        return row[2]
+
+    def set_hash(self, path: Path, kind: str, value: str) -> None:
+        if kind not in _hash_kinds:
+            raise ValueError(f"unknown hash kind '{kind}'")
+        key = file_key(path=path)
+        if key is None:
+            return
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute("SELECT size, mtime_ns FROM hashes WHERE path = ?", (key[0], )).fetchone()
+            if row is None or (row[0], row[1]) != key[1:]:
+                connection.execute("INSERT OR REPLACE INTO hashes (path, size, mtime_ns, accessed) "
+                                   "VALUES (?, ?, ?, ?)", (*key, time.time_ns()))
+            connection.execute(f"UPDATE hashes SET {kind} = ? WHERE path = ?", (value, key[0]))
+            connection.commit()
+            self._evict_if_full(connection=connection, table="hashes", added=0 if row is not None else 1)
+
+    def clear(self) -> None:
+        with self._lock:
+            connection = self._connect()
+            for table in _tables:
+                connection.execute(f"DELETE FROM {table}")
+            connection.commit()
+            self._row_estimates = {}
+
+    def evict(self) -> None:
+        with self._lock:
+            connection = self._connect()
+            for table in _tables:
+                self._evict(connection=connection, table=table)
+
+    def _evict(self, connection: sqlite3.Connection, table: str) -> None:
+        count = connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if count > self._max_entries:
+            connection.execute(f"DELETE FROM {table} WHERE path IN "
+                               f"(SELECT path FROM {table} ORDER BY accessed ASC LIMIT ?)",
+                               (count - self._max_entries, ))
+            connection.commit()
+            profiling.count(name="cache evictions", value=count - self._max_entries)
+            count = self._max_entries
+        self._row_estimates[table] = count
+
+    def _evict_if_full(self, connection: sqlite3.Connection, table: str, added: int) -> None:
+        if table not in self._row_estimates:
+            self._evict(connection=connection, table=table)
+            return
+        self._row_estimates[table] += added
+        if self._row_estimates[table] > self._max_entries:
+            self._evict(connection=connection, table=table)
+
+    def close(self) -> None:
+        if self._connection is None:
+            return
+        self.evict()
+        with self._lock:
+            self._connection.close()
+            self._connection = None
+
+
+_cache: Optional[MetadataCache] = None
+_enabled = True
+
+
+def metadata_cache() -> Optional[MetadataCache]:
+    global _cache
+    if not _enabled:
+        return None
+    if _cache is None:
+        _cache = MetadataCache(file=default_cache_file(), max_entries=config.cache_max_entries)
+    return _cache
+
+
+def disable() -> None:
+    global _enabled
+    close()
+    _enabled = False
+
+
+def rebuild() -> None:
+    cache = metadata_cache()
+    if cache is not None:
+        cache.clear()
+
+
+def close() -> None:
+    if _cache is not None:
+        _cache.close()
+
+
+atexit.register(close)
@@ -0,0 +1,85 @@
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from picstore.config import config
+
+
+_schema = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER
+);
+CREATE TABLE IF NOT EXISTS picdirs (
+    directory TEXT PRIMARY KEY,
+    present INTEGER NOT NULL DEFAULT 1,
+    state TEXT
+);
+"""
+
+
+class Catalog:
+
+    file_name = ".picstore-catalog.sqlite"
+
+    def __init__(self, directory: Path):
+        self._path = directory / Catalog.file_name
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self._path, timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=PERSIST")
+        self._connection.executescript(_schema)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def directory_names(self, mtime_ns: int) -> Optional[List[str]]:
+        with self._lock:
+            row = self._connection.execute("SELECT value FROM meta WHERE key = 'mtime_ns'").fetchone()
+            if row is None or row[0] != mtime_ns:
+                return None
+            rows = self._connection.execute("SELECT directory FROM picdirs WHERE present = 1")
+            return list(map(lambda r: r[0], rows))
+
+    def set_directory_names(self, names: List[str], mtime_ns: int) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("UPDATE picdirs SET present = 0")
+            self._connection.executemany("INSERT INTO picdirs (directory) VALUES (?) "
+                                         "ON CONFLICT (directory) DO UPDATE SET present = 1",
+                                         map(lambda n: (n, ), names))
+            self._connection.execute("DELETE FROM picdirs WHERE present = 0")
+            self._connection.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('mtime_ns', ?)",
+                                     (mtime_ns, ))
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._connection.execute("SELECT state FROM picdirs WHERE directory = ? AND state IS NOT NULL",
+                                           (name, )).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, name: str, state: Dict[str, Any]) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("INSERT INTO picdirs (directory, state) VALUES (?, ?) "
+                                     "ON CONFLICT (directory) DO UPDATE SET state = excluded.state",
+                                     (name, json.dumps(state)))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+_catalogs: Dict[Tuple[int, Path], Catalog] = {}
+
+
+def open_catalog(directory: Path) -> Optional[Catalog]:
+    if not config.use_catalog:
+        return None
+    key = os.getpid(), directory.absolute()
+    if key not in _catalogs:
+        try:
+            _catalogs[key] = Catalog(directory=directory)
+        except (OSError, sqlite3.Error):
+            return None
+    return _catalogs[key]
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Sequence
 from datetime import datetime
 
 
@@ -32,3 +32,34 @@ class PicDirDuplicateError(PicstoreException):
         PicstoreException.__init__(self)
         self.name = name
         self.date = date
+
+
+class ExifParseError(PicstoreException):
+    def __init__(self, path: Path):
+        PicstoreException.__init__(self)
+        self.path = path
+
+
+class MetadataError(PicstoreException):
+    def __init__(self, paths: Sequence[str]):
+        PicstoreException.__init__(self)
+        self.paths = paths
+
+
+class InvalidRuleError(PicstoreException):
+    def __init__(self, rule: str):
+        PicstoreException.__init__(self)
+        self.rule = rule
+
+
+class InsufficientSpaceError(PicstoreException):
+    def __init__(self, required: int, available: int):
+        PicstoreException.__init__(self)
+        self.required = required
+        self.available = available
+
+
+class UnfinishedAddError(PicstoreException):
+    def __init__(self, journal: Path):
+        PicstoreException.__init__(self)
+        self.journal = journal
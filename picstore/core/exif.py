@@ -0,0 +1,108 @@
+import struct
+from pathlib import Path
+from typing import BinaryIO, Optional
+from picstore.core.error import ExifParseError
+
+
+_model_tag = 0x0110
+_ascii_type = 2
+_header_size = 64 * 1024
+
+
+def read_model(path: Path) -> Optional[str]:
+    with open(path, "rb") as fp:
+        header = fp.read(_header_size)
+        if header[:2] == b"\xff\xd8":
+            return _read_jpeg_model(path=path, fp=fp, header=header)
+        elif header[:8] == b"\x89PNG\r\n\x1a\n":
+            return _read_png_model(path=path, fp=fp)
+        elif header[:4] in (b"II*\x00", b"MM\x00*"):
+            return _read_tiff_model(path=path, fp=fp, start=0, header=header)
+    raise ExifParseError(path=path)
+
+
+def _read_at(fp: BinaryIO, header: bytes, start: int, offset: int, size: int) -> bytes:
+    position = start + offset
+    if position + size <= len(header):
+        return header[position:position + size]
+    fp.seek(position)
+    return fp.read(size)
+
+
+def _read_tiff_model(path: Path, fp: BinaryIO, start: int, header: bytes) -> Optional[str]:
+    byte_order = _read_at(fp=fp, header=header, start=start, offset=0, size=2)
+    if byte_order == b"II":
+        endian = "<"
+    elif byte_order == b"MM":
+        endian = ">"
+    else:
+        raise ExifParseError(path=path)
+    tiff_header = _read_at(fp=fp, header=header, start=start, offset=2, size=6)
+    if len(tiff_header) != 6:
+        raise ExifParseError(path=path)
+    magic, ifd_offset = struct.unpack(endian + "HI", tiff_header)
+    if magic != 42:
+        raise ExifParseError(path=path)
+    count_data = _read_at(fp=fp, header=header, start=start, offset=ifd_offset, size=2)
+    if len(count_data) != 2:
+        raise ExifParseError(path=path)
+    entry_count = struct.unpack(endian + "H", count_data)[0]
+    entries = _read_at(fp=fp, header=header, start=start, offset=ifd_offset + 2, size=12 * entry_count)
+    if len(entries) != 12 * entry_count:
+        raise ExifParseError(path=path)
+    for i in range(entry_count):
+        tag, value_type, count = struct.unpack(endian + "HHI", entries[12 * i:12 * i + 8])
+        if tag != _model_tag:
+            continue
+        if value_type != _ascii_type:
+            raise ExifParseError(path=path)
+        if count <= 4:
+            value = entries[12 * i + 8:12 * i + 8 + count]
+        else:
+            value_offset = struct.unpack(endian + "I", entries[12 * i + 8:12 * i + 12])[0]
+            value = _read_at(fp=fp, header=header, start=start, offset=value_offset, size=count)
+            if len(value) != count:
+                raise ExifParseError(path=path)
+        model = value.split(b"\x00", 1)[0].decode("utf-8", errors="replace").strip()
+        return model if len(model) > 0 else None
+    return None
+
+
+def _read_jpeg_model(path: Path, fp: BinaryIO, header: bytes) -> Optional[str]:
+    position = 2
+    while True:
+        marker = _read_at(fp=fp, header=header, start=0, offset=position, size=4)
+        if len(marker) != 4 or marker[0] != 0xFF:
+            raise ExifParseError(path=path)
+        if marker[1] == 0xFF:
+            position += 1
+            continue
+        if marker[1] in (0xD9, 0xDA):
+            return None
+        if 0xD0 <= marker[1] <= 0xD7 or marker[1] == 0x01:
+            position += 2
+            continue
+        length = struct.unpack(">H", marker[2:])[0]
+        if marker[1] == 0xE1:
+            identifier = _read_at(fp=fp, header=header, start=0, offset=position + 4, size=6)
+            if identifier == b"Exif\x00\x00":
+                return _read_tiff_model(path=path, fp=fp, start=position + 10, header=header)
+        position += 2 + length
+
+
+def _read_png_model(path: Path, fp: BinaryIO) -> Optional[str]:
+    position = 8
+    while True:
+        fp.seek(position)
+        chunk_header = fp.read(8)
+        if len(chunk_header) != 8:
+            raise ExifParseError(path=path)
+        length, chunk_type = struct.unpack(">I4s", chunk_header)
+        if chunk_type == b"eXIf":
+            start = position + 8
+            if fp.read(6) == b"Exif\x00\x00":
+                start += 6
+            return _read_tiff_model(path=path, fp=fp, start=start, header=b"")
+        elif chunk_type == b"IEND":
+            return None
+        position += 12 + length
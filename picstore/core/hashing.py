@@ -0,0 +1,69 @@
+import hashlib
+from pathlib import Path
+from typing import Iterable, Optional
+from picstore import profiling
+from picstore.core.cache import metadata_cache
+
+
+_partial_size = 4 * 1024 * 1024
+_block_size = 1024 * 1024
+
+
+def partial_hash(path: Path) -> str:
+    cached = _cached_hash(path=path, kind="partial")
+    if cached is not None:
+        return cached
+    digest = hashlib.blake2b(digest_size=32)
+    with profiling.span("hash") as span, open(path, "rb") as fp:
+        size = fp.seek(0, 2)
+        fp.seek(0)
+        digest.update(fp.read(_partial_size))
+        if size > _partial_size:
+            fp.seek(max(_partial_size, size - _partial_size))
+            digest.update(fp.read(_partial_size))
+        digest.update(size.to_bytes(8, "little"))
+        span.add(files=1, bytes=min(size, 2 * _partial_size))
+    value = digest.hexdigest()
+    _store_hash(path=path, kind="partial", value=value)
+    return value
+
+
+def full_hash(path: Path) -> str:
+    cached = _cached_hash(path=path, kind="full")
+    if cached is not None:
+        return cached
+    digest = hashlib.blake2b(digest_size=32)
+    with profiling.span("hash") as span, open(path, "rb") as fp:
+        for block in iter(lambda: fp.read(_block_size), b""):
+            digest.update(block)
+        span.add(files=1, bytes=fp.tell())
+    value = digest.hexdigest()
+    _store_hash(path=path, kind="full", value=value)
+    return value
+
+
+def is_duplicate(candidate: Path, others: Iterable[Path]) -> bool:
+    size = candidate.stat().st_size
+    for other in others:
+        if other.stat().st_size != size:
+            continue
+        if partial_hash(path=other) != partial_hash(path=candidate):
+            continue
+        if not needs_full_hash(size=size) or full_hash(path=other) == full_hash(path=candidate):
+            return True
+    return False
+
+
+def needs_full_hash(size: int) -> bool:
+    return size > 2 * _partial_size
+
+
+def _cached_hash(path: Path, kind: str) -> Optional[str]:
+    cache = metadata_cache()
+    return None if cache is None else cache.get_hash(path=path, kind=kind)
+
+
+def _store_hash(path: Path, kind: str, value: str) -> None:
+    cache = metadata_cache()
+    if cache is not None:
+        cache.set_hash(path=path, kind=kind, value=value)
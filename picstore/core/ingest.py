@@ -0,0 +1,292 @@
+import os
+import queue
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Generator, Iterable, List, Optional, Tuple
+from picstore import profiling
+from picstore.core import pictype, transfer, hashing, pairs
+from picstore.core.subdir import SubDir
+from picstore.core.rules import OwnerRule
+from picstore.core.journal import Journal
+from picstore.core.error import MetadataError
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from tqdm import tqdm
+
+
+_done = object()
+_poll_interval = 0.05
+_queued_chunks = 4
+
+Router = Callable[[Path, pictype.Category, pictype.Ownership], Optional[SubDir]]
+
+
+class _Stopped(Exception):
+    pass
+
+
+class Ingest:
+    def __init__(
+            self,
+            route: Router,
+            copy: bool,
+            dedupe: bool,
+            workers: int,
+            chunk_size: int,
+            display_tqdm: bool,
+            description: str,
+            rule: Optional[OwnerRule] = None,
+            journal: Optional[Journal] = None
+    ):
+        self._route = route
+        self._copy = copy
+        self._dedupe = dedupe
+        self._workers = max(1, workers)
+        self._chunk_size = chunk_size
+        self._display_tqdm = display_tqdm
+        self._description = description
+        self._rule = rule
+        self._journal = journal
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._errors: List[BaseException] = []
+        self._in_flight: Dict[Tuple[Path, int], List[Path]] = {}
+        self._count = 0
+
+    def run(self, files: Iterable[Path]) -> int:
+        scanned = queue.Queue(maxsize=_queued_chunks * self._chunk_size)
+        classified = queue.Queue(maxsize=_queued_chunks)
+        resolved = queue.Queue(maxsize=_queued_chunks)
+        self._scan_progress = self._progress(desc="scanning", position=0)
+        self._resolve_progress = self._progress(desc="reading metadata", position=1)
+        self._transfer_progress = self._progress(desc=self._description, position=2)
+        stages = [
+            threading.Thread(target=self._stage, args=(self._scan, files, scanned), daemon=True),
+            threading.Thread(target=self._stage, args=(self._classify, scanned, classified), daemon=True),
+            threading.Thread(target=self._stage, args=(self._resolve, classified, resolved), daemon=True)
+        ]
+        for stage in stages:
+            stage.start()
+        try:
+            self._transfer(inbox=resolved)
+        except BaseException as e:
+            self._errors.append(e)
+        finally:
+            self._stopped.set()
+            for stage in stages:
+                stage.join()
+            for progress in (self._scan_progress, self._resolve_progress, self._transfer_progress):
+                progress.close()
+        if len(self._errors) > 0:
+            raise self._errors[0]
+        return self._count
+
+    def _progress(self, desc: str, position: int) -> "tqdm":
+        from tqdm import tqdm
+        return tqdm(desc=desc, unit="files", position=position, leave=True, disable=not self._display_tqdm)
+
+    def _stage(self, function: Callable, inbox, outbox: queue.Queue) -> None:
+        try:
+            function(inbox, outbox)
+        except _Stopped:
+            pass
+        except BaseException as e:
+            self._errors.append(e)
+            self._stopped.set()
+        finally:
+            try:
+                self._put(outbox=outbox, item=_done)
+            except _Stopped:
+                pass
+
+    def _put(self, outbox: queue.Queue, item) -> None:
+        while True:
+            try:
+                outbox.put(item, timeout=_poll_interval)
+                return
+            except queue.Full:
+                if self._stopped.is_set():
+                    raise _Stopped()
+
+    def _get(self, inbox: queue.Queue, timeout: Optional[float] = None):
+        waited = 0.0
+        while True:
+            try:
+                return inbox.get(timeout=_poll_interval)
+            except queue.Empty:
+                if self._stopped.is_set():
+                    raise _Stopped()
+                waited += _poll_interval
+                if timeout is not None and waited >= timeout:
+                    raise
+
+    def _items(self, inbox: queue.Queue) -> Generator:
+        while True:
+            item = self._get(inbox=inbox)
+            if item is _done:
+                return
+            yield item
+
+    def _scan(self, files: Iterable[Path], outbox: queue.Queue) -> None:
+        for file in files:
+            if self._stopped.is_set():
+                raise _Stopped()
+            self._put(outbox=outbox, item=file)
+            self._scan_progress.update(1)
+
+    def _classify(self, inbox: queue.Queue, outbox: queue.Queue) -> None:
+        chunk = []
+        while True:
+            try:
+                file = self._get(inbox=inbox, timeout=_poll_interval if len(chunk) > 0 else None)
+            except queue.Empty:
+                complete = _complete_groups(chunk=chunk)
+                if complete > 0:
+                    self._put(outbox=outbox, item=tuple(chunk[:complete]))
+                    chunk = chunk[complete:]
+                continue
+            if file is _done:
+                break
+            if pictype.suffix_category(path=file) == pictype.Category.Undefined:
+                continue
+            if len(chunk) >= self._chunk_size and pairs.group_key(path=file) != pairs.group_key(path=chunk[-1]):
+                self._put(outbox=outbox, item=tuple(chunk))
+                chunk = []
+            chunk.append(file)
+        if len(chunk) > 0:
+            self._put(outbox=outbox, item=tuple(chunk))
+
+    def _resolve(self, inbox: queue.Queue, outbox: queue.Queue) -> None:
+        for chunk in self._items(inbox=inbox):
+            resolved = self._resolve_chunk(chunk=chunk)
+            self._put(outbox=outbox, item=resolved)
+            self._resolve_progress.update(len(resolved))
+
+    def _resolve_chunk(self, chunk: Tuple[Path, ...]) -> List[Tuple[Path, pictype.Category, pictype.Ownership]]:
+        ruled = {} if self._rule is None else {file: self._rule.owner(path=file) for file in chunk}
+        unruled = tuple(filter(lambda f: ruled.get(f) is None, chunk))
+        try:
+            types = {} if len(unruled) == 0 else pictype.get_types(paths=unruled, use_shell=False)
+        except MetadataError:
+            if len(unruled) == 1:
+                print(f"ERROR: Cannot read metadata of {unruled[0]}")
+                types = {}
+            else:
+                middle = len(unruled) // 2
+                resolved = self._resolve_chunk(chunk=unruled[:middle]) + self._resolve_chunk(chunk=unruled[middle:])
+                types = {file: (category, owner) for file, category, owner in resolved}
+        for file in chunk:
+            if ruled.get(file) is not None:
+                types[file] = pictype.suffix_category(path=file), ruled[file]
+        return [(file, *types[file]) for file in chunk if file in types]
+
+    def _transfer(self, inbox: queue.Queue) -> None:
+        in_flight = threading.BoundedSemaphore(2 * self._workers)
+        with transfer.TransferPool(workers=self._workers, journal=self._journal) as pool:
+            for chunk in self._items(inbox=inbox):
+                for file, destination in self._plan(chunk=chunk):
+                    while not in_flight.acquire(timeout=_poll_interval):
+                        if self._stopped.is_set():
+                            raise _Stopped()
+                    future = pool.submit(source=file, directory=destination.path, copy=self._copy)
+                    future.add_done_callback(lambda f, p=file, d=destination: self._finish(f, p, d, in_flight))
+
+    def _plan(self, chunk: List[Tuple[Path, pictype.Category, pictype.Ownership]]) -> List[Tuple[Path, SubDir]]:
+        planned = []
+        for file, category, owner in chunk:
+            destination = self._destination(picture=file, category=category, owner=owner)
+            if destination is None:
+                continue
+            try:
+                planned.append((file, destination, file.stat().st_size))
+            except OSError as e:
+                self._drop(picture=file, destination=destination)
+                print(f"ERROR: Cannot transfer {file}: {e}")
+                self._transfer_progress.update(1)
+        if self._journal is not None and len(planned) > 0:
+            self._journal.plan_all(transfers=[(f, d.path / f.name, size) for f, d, size in planned], copy=self._copy)
+        return [(file, destination) for file, destination, _ in planned]
+
+    def _destination(self, picture: Path, category: pictype.Category, owner: pictype.Ownership) -> Optional[SubDir]:
+        with self._lock:
+            destination = self._route(picture, category, owner)
+            if destination is None:
+                return None
+            if not self._dedupe:
+                destination.reserve(name=picture.name)
+                return destination
+            size = os.stat(picture).st_size
+            stored = tuple(map(lambda n: destination.path / n, destination.names_with_size(size=size)))
+            planned = tuple(self._in_flight.get((destination.path, size), ()))
+        if self._is_duplicate(picture=picture, others=stored + planned, destination=destination):
+            return None
+        with self._lock:
+            self._in_flight.setdefault((destination.path, size), []).append(picture)
+            destination.reserve(name=picture.name)
+        return destination
+
+    @staticmethod
+    def _is_duplicate(picture: Path, others: Tuple[Path, ...], destination: SubDir) -> bool:
+        for attempt in range(2):
+            try:
+                return hashing.is_duplicate(candidate=picture, others=map(lambda o: _landed(o, destination), others))
+            except FileNotFoundError:
+                if attempt > 0 or not picture.exists():
+                    raise
+        return False
+
+    def _finish(self, future: "Future[int]", picture: Path, destination: SubDir, in_flight) -> None:
+        in_flight.release()
+        try:
+            size = future.result()
+            with self._lock:
+                self._forget(picture=picture, destination=destination)
+                destination.register(name=picture.name, size=size)
+                self._count += 1
+        except OSError as e:
+            self._drop(picture=picture, destination=destination)
+            print(f"ERROR: Cannot transfer {picture}: {e}")
+        self._transfer_progress.update(1)
+
+    def _drop(self, picture: Path, destination: SubDir) -> None:
+        with self._lock:
+            self._forget(picture=picture, destination=destination)
+            destination.release(name=picture.name)
+
+    def _forget(self, picture: Path, destination: SubDir) -> None:
+        for key, planned in tuple(filter(lambda i: i[0][0] == destination.path, self._in_flight.items())):
+            if picture in planned:
+                planned.remove(picture)
+                if len(planned) == 0:
+                    del self._in_flight[key]
+                return
+
+
+def _landed(picture: Path, destination: SubDir) -> Path:
+    if picture.parent == destination.path or picture.exists():
+        return picture
+    return destination.path / picture.name
+
+
+def _complete_groups(chunk: List[Path]) -> int:
+    last = pairs.group_key(path=chunk[-1])
+    complete = len(chunk)
+    while complete > 0 and pairs.group_key(path=chunk[complete - 1]) == last:
+        complete -= 1
+    return complete
+
+
+def scan_files(directory: Path, recursive: bool) -> Generator[Path, None, None]:
+    pending = [directory]
+    while len(pending) > 0:
+        files = []
+        with profiling.span("scan") as span, os.scandir(pending.pop()) as entries:
+            for entry in sorted(entries, key=lambda e: e.name):
+                if entry.is_dir(follow_symlinks=False):
+                    if recursive:
+                        pending.append(Path(entry.path))
+                elif entry.is_file():
+                    files.append(Path(entry.path))
+            span.add(files=len(files))
+        yield from files
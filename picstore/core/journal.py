@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+
+_planned = "planned"
+_done = "done"
+_failed = "failed"
+
+
+class JournalEntry(NamedTuple):
+    source: Path
+    destination: Path
+    copy: bool
+    size: int
+    state: str
+
+
+class Journal:
+
+    file_name = ".picstore-journal"
+
+    def __init__(self, directory: Path, sync_every: int):
+        self._path = directory / Journal.file_name
+        self._sync_every = max(1, sync_every)
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._fp = open(self._path, "a")
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @staticmethod
+    def pending(directory: Path) -> List[JournalEntry]:
+        entries: Dict[str, JournalEntry] = {}
+        try:
+            with open(directory / Journal.file_name, "r") as fp:
+                for line in fp:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record["state"] == _planned:
+                        entries[record["source"]] = JournalEntry(source=Path(record["source"]),
+                                                                 destination=Path(record["destination"]),
+                                                                 copy=record["copy"],
+                                                                 size=record["size"],
+                                                                 state=_planned)
+                    elif record["source"] in entries:
+                        entries[record["source"]] = entries[record["source"]]._replace(state=record["state"])
+        except FileNotFoundError:
+            return []
+        return [entry for entry in entries.values() if entry.state not in (_done, _failed)]
+
+    def plan(self, source: Path, destination: Path, copy: bool, size: int) -> None:
+        self.plan_all(transfers=[(source, destination, size)], copy=copy)
+
+    def plan_all(self, transfers: Sequence[Tuple[Path, Path, int]], copy: bool) -> None:
+        self._write(records=[{"state": _planned,
+                              "source": str(source.absolute()),
+                              "destination": str(destination.absolute()),
+                              "copy": copy,
+                              "size": size} for source, destination, size in transfers], sync=True)
+
+    def done(self, source: Path) -> None:
+        self._write(records=[{"state": _done, "source": str(source.absolute())}])
+
+    def failed(self, source: Path) -> None:
+        self._write(records=[{"state": _failed, "source": str(source.absolute())}])
+
+    def _write(self, records: Sequence[Dict], sync: bool = False) -> None:
+        with self._lock:
+            self._fp.write("".join(map(lambda r: json.dumps(r) + "\n", records)))
+            self._fp.flush()
+            self._unsynced += len(records)
+            if sync or self._unsynced >= self._sync_every:
+                self._sync()
+
+    def _sync(self) -> None:
+        os.fsync(self._fp.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fp.closed:
+                return
+            self._sync()
+            self._fp.close()
+        if len(Journal.pending(directory=self._path.parent)) == 0:
+            try:
+                os.remove(self._path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
@@ -0,0 +1,49 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from picstore.config import config
+
+
+_raw_suffixes = config.raw_types
+_std_suffixes = config.std_types
+
+GroupKey = Tuple[Optional[Path], str]
+
+
+class PictureGroup(NamedTuple):
+    stem: str
+    members: Tuple[Path, ...]
+
+    @property
+    def raw(self) -> Tuple[Path, ...]:
+        return tuple(filter(lambda p: p.suffix.upper() in _raw_suffixes, self.members))
+
+    @property
+    def std(self) -> Tuple[Path, ...]:
+        return tuple(filter(lambda p: p.suffix.upper() in _std_suffixes, self.members))
+
+    @property
+    def is_pair(self) -> bool:
+        return len(self.raw) > 0 and len(self.std) > 0
+
+    @property
+    def is_orphan(self) -> bool:
+        return not self.is_pair
+
+    def by_preference(self) -> Tuple[Path, ...]:
+        return self.raw + tuple(filter(lambda p: p.suffix.upper() not in _raw_suffixes, self.members))
+
+
+def group_key(path: Path, by_directory: bool = True) -> GroupKey:
+    return path.parent if by_directory else None, path.stem.casefold()
+
+
+def group_pictures(paths: Iterable[Path], by_directory: bool = True) -> List[PictureGroup]:
+    groups: Dict[GroupKey, List[Path]] = {}
+    for path in paths:
+        groups.setdefault(group_key(path=path, by_directory=by_directory), []).append(path)
+    return [PictureGroup(stem=members[0].stem, members=tuple(members)) for members in groups.values()]
+
+
+def orphans(paths: Iterable[Path], by_directory: bool = True) -> List[Path]:
+    groups = group_pictures(paths=paths, by_directory=by_directory)
+    return [path for group in groups if group.is_orphan for path in group.members]
@@ -1,9 +1,51 @@
+import os
 from pathlib import Path
-from typing import List, Optional, Literal
+from typing import List, Optional, Literal, Dict, Tuple, Iterable
 from datetime import datetime
 from collections.abc import Sequence
+from picstore import profiling
+from picstore.core import pictype
 from picstore.core.picdir import PicDir
-from picstore.core.error import PicDirNotFoundError, PicDirDuplicateError
+from picstore.core.error import PicDirNotFoundError, PicDirDuplicateError, MissingSubDirError
+from picstore.core.catalog import Catalog, open_catalog
+
+
+class PicDirEntry:
+    def __init__(self, path: Path, picdir: Optional[PicDir] = None):
+        self._path = path
+        self._name, self._date = PicDir.parse_name(directory_name=path.name)
+        self._picdir = picdir
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def date(self) -> datetime.date:
+        return self._date
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._picdir is not None
+
+    @property
+    def is_valid(self) -> bool:
+        if self._picdir is None:
+            try:
+                self._picdir = PicDir(path_or_parent=self._path)
+            except (MissingSubDirError, NotADirectoryError):
+                return False
+        return True
+
+    @property
+    def picdir(self) -> PicDir:
+        if self._picdir is None:
+            self._picdir = PicDir(path_or_parent=self._path)
+        return self._picdir
 
 
 class ParentDir(Sequence[PicDir]):
@@ -12,41 +54,69 @@ class ParentDir(Sequence[PicDir]):
         if not directory.is_dir():
             raise NotADirectoryError(f"{directory} is not a directory")
         self._path = directory
-        self._picdirs = self._load_picdirs()
+        self._entries: List[PicDirEntry] = []
+        self._by_name: Dict[str, List[PicDirEntry]] = {}
+        self._by_name_and_date: Dict[Tuple[str, datetime.date], List[PicDirEntry]] = {}
+        self._mtime_ns: Optional[int] = None
+        self.update()
 
     def __len__(self):
-        return len(self._picdirs)
+        return len(self.entries)
 
     def __getitem__(self, item):
-        return self._picdirs[item]
-
-    def _load_picdirs(self) -> List[PicDir]:
-        picdirs = []
-        for path in self.path.iterdir():
-            if not path.is_dir():
-                continue
-            elif not PicDir.is_name_correct(directory=path):
-                continue
-            elif not PicDir.required_directories_exist(directory=path):
-                continue
-            picdirs.append(PicDir(path_or_parent=path))
-        return picdirs
+        if isinstance(item, slice):
+            return [entry.picdir for entry in self.entries[item]]
+        return self.entries[item].picdir
+
+    def _load_entries(self, catalog: Optional[Catalog]) -> List[PicDirEntry]:
+        known = {entry.path: entry for entry in self._entries}
+        names = None if catalog is None else catalog.directory_names(mtime_ns=self._mtime_ns)
+        if names is None:
+            names = self._scan_names()
+            if catalog is not None:
+                catalog.set_directory_names(names=names, mtime_ns=self._mtime_ns)
+        entries = []
+        for name in names:
+            path = self.path / name
+            entries.append(known[path] if path in known else PicDirEntry(path=path))
+        return entries
+
+    def _scan_names(self) -> List[str]:
+        names = []
+        with profiling.span("scan") as span, os.scandir(self.path) as directory_entries:
+            for directory_entry in directory_entries:
+                if directory_entry.is_dir() and PicDir.is_valid_name(directory_name=directory_entry.name):
+                    names.append(directory_entry.name)
+            span.add(files=len(names))
+        return names
 
     @property
     def path(self) -> Path:
         return self._path
 
+    @property
+    def entries(self) -> List[PicDirEntry]:
+        return list(filter(lambda e: e.is_valid, self._entries))
+
+    def _index(self, entry: PicDirEntry) -> None:
+        self._by_name.setdefault(entry.name, []).append(entry)
+        self._by_name_and_date.setdefault((entry.name, entry.date), []).append(entry)
+
+    def _refresh(self) -> None:
+        if self._mtime_ns != self.path.stat().st_mtime_ns:
+            self.update()
+
     def get(self, name: str, date: Optional[datetime.date] = None) -> PicDir:
-        self.update()
-        for picdir in self:
-            if date is None and picdir.name == name:
-                return picdir
-            elif date is not None and picdir.name == name and picdir.date == date:
-                return picdir
+        self._refresh()
+        if date is None:
+            candidates = self._by_name.get(name, [])
+        else:
+            candidates = self._by_name_and_date.get((name, date), [])
+        for entry in filter(lambda e: e.is_valid, candidates):
+            return entry.picdir
         raise PicDirNotFoundError(name=name, date=date)
 
     def exists(self, name: str, date: Optional[datetime.date] = None) -> bool:
-        self.update()
         try:
             self.get(name=name, date=date)
             return True
@@ -57,19 +127,41 @@ class ParentDir(Sequence[PicDir]):
         if self.exists(name=name, date=date):
             raise PicDirDuplicateError(name=name, date=date)
         new_picdir = PicDir(path_or_parent=self.path, name=name, date=date)
-        self._picdirs.append(new_picdir)
+        entry = PicDirEntry(path=new_picdir.path, picdir=new_picdir)
+        self._entries.append(entry)
+        self._index(entry=entry)
+        self._mtime_ns = self.path.stat().st_mtime_ns
+        catalog = open_catalog(directory=self.path)
+        if catalog is not None:
+            catalog.set_directory_names(names=[e.path.name for e in self._entries], mtime_ns=self._mtime_ns)
         return new_picdir
 
     def sort(self, attribute: Literal["name", "date", "raw", "std"] = "date") -> None:
-        self.update()
+        self._refresh()
         if attribute == "name":
-            self._picdirs.sort(key=lambda p: p.name)
+            self._entries.sort(key=lambda e: e.name)
         elif attribute == "date":
-            self._picdirs.sort(key=lambda p: p.date)
+            self._entries.sort(key=lambda e: e.date)
         elif attribute == "raw":
-            self._picdirs.sort(key=lambda p: p.raw_count)
+            self._entries = sorted(self.entries, key=lambda e: e.picdir.raw_count)
         elif attribute == "std":
-            self._picdirs.sort(key=lambda p: p.std_count)
+            self._entries = sorted(self.entries, key=lambda e: e.picdir.std_count)
 
     def update(self) -> None:
-        self._picdirs = self._load_picdirs()
+        catalog = open_catalog(directory=self.path)
+        self._mtime_ns = self.path.stat().st_mtime_ns
+        self._entries = self._load_entries(catalog=catalog)
+        self._by_name = {}
+        self._by_name_and_date = {}
+        for entry in self._entries:
+            self._index(entry=entry)
+
+    def prefetch(self, entries: Optional[Iterable[PicDirEntry]] = None) -> None:
+        files = []
+        for entry in self.entries if entries is None else entries:
+            for directory in (entry.picdir.raw, entry.picdir.std, entry.picdir.other):
+                files.extend(directory.iterdir())
+        pictype.prefetch(paths=tuple(files))
+
+    def invalidate(self) -> None:
+        self._mtime_ns = None
@@ -1,12 +1,18 @@
 from pathlib import Path
 import datetime
-from typing import Tuple, Optional, Dict
-from colorama import Fore, Style
-from tqdm import tqdm
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+from typing import Tuple, Optional, Dict, Iterable, List, NamedTuple
 from picstore.config import config
-from picstore.core import pictype
+from picstore.core import pictype, ingest, pairs, transfer
 from picstore.core.subdir import SubDir
-from picstore.core.error import MissingSubDirError
+from picstore.core.catalog import open_catalog
+from picstore.core.rules import OwnerRule
+from picstore.core.journal import Journal, JournalEntry
+from picstore.core.error import MissingSubDirError, UnfinishedAddError, InsufficientSpaceError
 
 
 date_format = "%Y-%m-%d"
@@ -14,11 +20,27 @@ date_format = "%Y-%m-%d"
 
 _raw_suffixes = config.raw_types
 _std_suffixes = config.std_types
+_chunk_size = config.ingest_chunk_size
+_transfer_workers = config.transfer_workers
+_sync_every = config.journal_sync_every
+_camera_models = hashlib.blake2b(json.dumps(sorted(config.my_camera_models)).encode(), digest_size=16).hexdigest()
+
+
+class PicDirSummary(NamedTuple):
+    path: Path
+    name: str
+    date: datetime.date
+    raw_count: int
+    std_count: int
+    intact: bool
+    size: int = 0
+    audited_by_repair: bool = False
 
 
 class PicDir:
 
     required_directories = ["STD", "RAW", "EXP", "LR", "OTHR"]
+    state_file_name = ".picstore.json"
 
     def __init__(self, path_or_parent: Path, name: Optional[str] = None, date: Optional[datetime.date] = None):
         if (name is None and date is not None) or (name is not None and date is None):
@@ -45,26 +67,7 @@ class PicDir:
 
     def __str__(self):
         self.update()
-        tab = "   "
-        string = ""
-        if len(self.name) > 17:
-            string += self.name[:-3] + "..." + tab
-        else:
-            string += self.name.ljust(20) + tab
-        string += self.date.strftime(date_format) + tab
-        if self.raw_count >= 10 ** 5:
-            string += ">=10^5" + tab
-        else:
-            string += str(self.raw_count).ljust(6) + tab
-        if self.std_count >= 10 ** 5:
-            string += ">=10^5" + tab
-        else:
-            string += str(self.std_count).ljust(6) + tab
-        if self.is_intact():
-            string += f"{Fore.GREEN}{'ok'.ljust(6)}"
-        else:
-            string += f"{Fore.RED}{'bad'.ljust(6)}"
-        return f"{string}{Style.RESET_ALL}"
+        return PicDir.table_row(summary=self.summary())
 
     def _load_sub_directories(self) -> Dict[str, Path]:
         directories = {}
@@ -78,8 +81,12 @@ class PicDir:
     def _parse_directory_name(directory: Path) -> Tuple[str, datetime.date]:
         if not directory.is_dir():
             raise NotADirectoryError(f"{directory} is not a directory")
-        date = datetime.datetime.strptime(directory.name[:10], date_format)
-        name = directory.name[11:]
+        return PicDir.parse_name(directory_name=directory.name)
+
+    @staticmethod
+    def parse_name(directory_name: str) -> Tuple[str, datetime.date]:
+        date = datetime.datetime.strptime(directory_name[:10], date_format)
+        name = directory_name[11:]
         return name, date
 
     @property
@@ -119,43 +126,250 @@ class PicDir:
         self.std.update()
         self.other.update()
 
-    def add(self, directory: Path, display_tqdm: bool = True, recursive: bool = True, copy: bool = False) -> int:
+    def prefetch(self) -> None:
+        files = []
+        for directory in (self.raw, self.std, self.other):
+            files.extend(directory.iterdir())
+        pictype.prefetch(paths=tuple(files))
+
+    def orphans(self) -> List[Path]:
+        return pairs.orphans(paths=tuple(self.raw.iterdir()) + tuple(self.std.iterdir()), by_directory=False)
+
+    def add(
+            self,
+            directory: Path,
+            display_tqdm: bool = True,
+            recursive: bool = True,
+            copy: bool = False,
+            workers: int = _transfer_workers,
+            dedupe: bool = False,
+            rule: Optional[OwnerRule] = None
+    ) -> int:
         if not directory.is_dir():
             raise NotADirectoryError(f"{directory} is not a directory")
-        content = tuple(directory.iterdir())
-        if recursive:
-            content = tuple(directory.rglob("*"))
-        types = pictype.get_types(paths=content, use_shell=False)
-        destinations = {}
-        for file in content:
-            category, owner = types[file]
-            if self.raw.is_addable(picture=file, category=category, owner=owner):
-                destinations[file] = self.raw
-            elif self.std.is_addable(picture=file, category=category, owner=owner):
-                destinations[file] = self.std
-            elif self.other.is_addable(picture=file, category=category, owner=owner):
-                destinations[file] = self.other
-        if len(destinations) == 0:
-            return 0
-        iterator = tqdm(destinations, desc=f"adding {directory.name}", unit="files") if display_tqdm else destinations
+        if copy or directory.stat().st_dev != self.path.stat().st_dev:
+            self.check_free_space(files=ingest.scan_files(directory=directory, recursive=recursive), copy=copy)
+        return self.add_files(files=ingest.scan_files(directory=directory, recursive=recursive),
+                              display_tqdm=display_tqdm,
+                              copy=copy,
+                              workers=workers,
+                              dedupe=dedupe,
+                              description=f"adding {directory.name}",
+                              rule=rule)
+
+    def add_files(
+            self,
+            files: Iterable[Path],
+            display_tqdm: bool = True,
+            copy: bool = False,
+            workers: int = _transfer_workers,
+            dedupe: bool = False,
+            description: str = "adding",
+            rule: Optional[OwnerRule] = None
+    ) -> int:
+        if len(self.pending_transfers()) > 0:
+            raise UnfinishedAddError(journal=self.path / Journal.file_name)
+        with Journal(directory=self.path, sync_every=_sync_every) as journal:
+            pipeline = ingest.Ingest(route=self._route,
+                                     copy=copy,
+                                     dedupe=dedupe,
+                                     workers=workers,
+                                     chunk_size=_chunk_size,
+                                     display_tqdm=display_tqdm,
+                                     description=description,
+                                     rule=rule,
+                                     journal=journal)
+            return pipeline.run(files=files)
+
+    def pending_transfers(self) -> List[JournalEntry]:
+        return Journal.pending(directory=self.path)
+
+    def resume(self, workers: int = _transfer_workers) -> int:
+        from concurrent.futures import as_completed
+        for directory in (self.raw, self.std, self.other):
+            for path in filter(transfer.is_part_file, directory.iterdir()):
+                os.remove(path)
         count = 0
-        for file in iterator:
-            category, owner = types[file]
-            if destinations[file].add(picture=file, category=category, owner=owner, copy=copy):
-                count += 1
+        futures = {}
+        moved = []
+        with Journal(directory=self.path, sync_every=_sync_every) as journal, \
+                transfer.TransferPool(workers=workers, journal=journal) as pool:
+            for entry in self.pending_transfers():
+                if entry.destination.exists():
+                    if not entry.copy and entry.source.exists() and \
+                            entry.source.stat().st_size == entry.destination.stat().st_size:
+                        moved.append(entry)
+                    else:
+                        journal.done(source=entry.source)
+                    count += 1
+                elif entry.source.exists():
+                    future = pool.submit(source=entry.source, directory=entry.destination.parent, copy=entry.copy)
+                    futures[future] = entry
+                else:
+                    print(f"ERROR: Cannot resume transfer of {entry.source} since it no longer exists")
+                    journal.failed(source=entry.source)
+            transfer.sync_files(paths=[entry.destination for entry in moved])
+            for entry in moved:
+                os.remove(entry.source)
+                journal.done(source=entry.source)
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    count += 1
+                except OSError as e:
+                    print(f"ERROR: Cannot transfer {futures[future].source}: {e}")
+        self.update()
         return count
 
-    def is_intact(self) -> bool:
+    def check_free_space(self, files: Iterable[Path], copy: bool) -> None:
+        device = self.path.stat().st_dev
+        required = 0
+        for file in filter(lambda f: pictype.suffix_category(path=f) != pictype.Category.Undefined, files):
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            if copy or stat.st_dev != device:
+                required += stat.st_size
+        available = shutil.disk_usage(self.path).free
+        if required > available:
+            raise InsufficientSpaceError(required=required, available=available)
+
+    def _route(self, picture: Path, category: pictype.Category, owner: pictype.Ownership) -> Optional[SubDir]:
+        for destination in (self.raw, self.std, self.other):
+            if destination.is_addable(picture=picture, category=category, owner=owner):
+                return destination
+        return None
+
+    def is_intact(self, full: bool = False) -> bool:
         if not PicDir.is_name_correct(directory=self._path):
             return False
         if not PicDir.required_directories_exist(directory=self._path):
             return False
+        state = None if full else self.load_state()
+        if state is not None:
+            return state.intact
         if not self.raw.is_intact() or not self.std.is_intact():
             return False
         return True
 
+    def directory_mtimes(self) -> Dict[str, int]:
+        return {name: directory.stat().st_mtime_ns for name, directory in self._directories.items()}
+
+    def total_size(self) -> int:
+        size = 0
+        for directory in self._directories.values():
+            with os.scandir(directory) as entries:
+                size += sum(map(lambda e: e.stat().st_size, filter(lambda e: e.is_file(), entries)))
+        return size
+
+    def load_state(self) -> Optional[PicDirSummary]:
+        mtimes = self.directory_mtimes()
+        catalog = open_catalog(directory=self.path.parent)
+        try:
+            if catalog is None:
+                with open(self.path / PicDir.state_file_name, "r") as fp:
+                    state = json.load(fp)
+            else:
+                state = catalog.get(name=self.path.name)
+            if state is None or state["mtimes"] != mtimes or state["camera_models"] != _camera_models:
+                return None
+            return PicDirSummary(path=self.path,
+                                 name=self.name,
+                                 date=self.date,
+                                 raw_count=state["raw_count"],
+                                 std_count=state["std_count"],
+                                 intact=state["intact"],
+                                 size=state["size"],
+                                 audited_by_repair=state["audited_by_repair"])
+        except (OSError, ValueError, KeyError, sqlite3.Error):
+            return None
+
+    def save_state(self, summary: PicDirSummary, mtimes: Dict[str, int]) -> None:
+        state = {
+            "mtimes": mtimes,
+            "camera_models": _camera_models,
+            "raw_count": summary.raw_count,
+            "std_count": summary.std_count,
+            "intact": summary.intact,
+            "size": summary.size,
+            "audited_by_repair": summary.audited_by_repair
+        }
+        catalog = open_catalog(directory=self.path.parent)
+        try:
+            if catalog is None:
+                with open(self.path / PicDir.state_file_name, "w") as fp:
+                    json.dump(state, fp)
+            else:
+                catalog.put(name=self.path.name, state=state)
+        except (OSError, sqlite3.Error):
+            pass
+
+    def summary(self, full: bool = False) -> PicDirSummary:
+        state = None if full else self.load_state()
+        if state is not None:
+            return state
+        mtimes = self.directory_mtimes()
+        summary = self._summarize()
+        if config.use_catalog:
+            self.save_state(summary=summary, mtimes=mtimes)
+        return summary
+
+    def audit(self) -> PicDirSummary:
+        mtimes = self.directory_mtimes()
+        summary = self._summarize()._replace(audited_by_repair=True)
+        self.save_state(summary=summary, mtimes=mtimes)
+        return summary
+
+    def _summarize(self) -> PicDirSummary:
+        self.prefetch()
+        return PicDirSummary(path=self.path,
+                             name=self.name,
+                             date=self.date,
+                             raw_count=self.raw_count,
+                             std_count=self.std_count,
+                             intact=self.is_intact(full=True),
+                             size=self.total_size())
+
+    def fast_summary(self) -> PicDirSummary:
+        state = self.load_state()
+        if state is not None:
+            return state
+        return PicDirSummary(path=self.path,
+                             name=self.name,
+                             date=self.date,
+                             raw_count=self.raw.estimate_count(),
+                             std_count=self.std.estimate_count(),
+                             intact=self.is_intact(full=True),
+                             size=self.total_size())
+
+    @staticmethod
+    def table_row(summary: PicDirSummary) -> str:
+        from colorama import Fore, Style
+        tab = "   "
+        string = ""
+        if len(summary.name) > 20:
+            string += summary.name[:17] + "..." + tab
+        else:
+            string += summary.name.ljust(20) + tab
+        string += summary.date.strftime(date_format) + tab
+        if summary.raw_count >= 10 ** 5:
+            string += ">=10^5" + tab
+        else:
+            string += str(summary.raw_count).ljust(6) + tab
+        if summary.std_count >= 10 ** 5:
+            string += ">=10^5" + tab
+        else:
+            string += str(summary.std_count).ljust(6) + tab
+        if summary.intact:
+            string += f"{Fore.GREEN}{'ok'.ljust(6)}"
+        else:
+            string += f"{Fore.RED}{'bad'.ljust(6)}"
+        return f"{string}{Style.RESET_ALL}"
+
     @staticmethod
     def table_header() -> str:
+        from colorama import Style
         tab = "   "
         string = "name".ljust(20) + tab
         string += "date".ljust(10) + tab
@@ -169,14 +383,18 @@ class PicDir:
     def is_name_correct(directory: Path) -> bool:
         if not directory.is_dir():
             raise NotADirectoryError(f"{directory} is not a directory")
-        name = directory.name
+        return PicDir.is_valid_name(directory_name=directory.name)
+
+    @staticmethod
+    def is_valid_name(directory_name: str) -> bool:
+        name = directory_name
         try:
             assert name[4] == name[7] == "-"
             assert name[10] == "_"
             int(name[:4])
             int(name[5:7])
             int(name[8:10])
-        except (AssertionError, ValueError):
+        except (AssertionError, ValueError, IndexError):
             return False
         return True
 
@@ -184,7 +402,8 @@ class PicDir:
     def required_directories_exist(directory: Path) -> bool:
         if not directory.is_dir():
             raise NotADirectoryError(f"{directory} is not a directory")
-        sub_directory_names = set(map(lambda d: d.name, directory.iterdir()))
+        with os.scandir(directory) as entries:
+            sub_directory_names = set(map(lambda e: e.name, filter(lambda e: e.is_dir(), entries)))
         return set(PicDir.required_directories) <= sub_directory_names
 
     @staticmethod
@@ -219,3 +438,4 @@ class PicDir:
         date = datetime.date(year=year, month=month, day=day)
         new_name = f"{date.strftime(date_format)}_{''.join(name_parts[3:])}"
         return directory.rename(directory.parent / new_name)
+
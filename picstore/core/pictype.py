@@ -1,14 +1,34 @@
-from exiftool import ExifToolHelper
+import atexit
 import enum
+import os
+import threading
 from pathlib import Path
-from typing import Tuple, Dict
+from typing import TYPE_CHECKING, Tuple, Dict, List, Optional, Union, Sequence
+from picstore import profiling
 from picstore.config import config
+from picstore.core.cache import metadata_cache, file_key
+from picstore.core import exif
+from picstore.core.error import ExifParseError, MetadataError
+
+if TYPE_CHECKING:
+    from exiftool import ExifToolHelper
 
 
 _raw_suffixes = config.raw_types
 _std_suffixes = config.std_types
 _my_camera_models = config.my_camera_models
 
+_min_shard_size = 32
+_models_limit = 65536
+
+_exiftools: List[Optional["ExifToolHelper"]] = [None, ] * max(1, config.exiftool_workers)
+_exiftool_locks = [threading.Lock() for _ in _exiftools]
+_exiftool_pid = os.getpid()
+_inherited_exiftools: List["ExifToolHelper"] = []
+_models: Dict[Tuple[str, int, int], Optional[str]] = {}
+
+metadata_fetches = 0
+
 
 class Category(enum.Enum):
     Std = enum.auto()
@@ -25,6 +45,10 @@ class Ownership(enum.Enum):
 def category(path: Path) -> Category:
     if not path.is_file():
         return Category.Undefined
+    return suffix_category(path=path)
+
+
+def suffix_category(path: Path) -> Category:
     suffix = path.suffix.upper()
     if suffix in _raw_suffixes:
         return Category.Raw
@@ -58,37 +82,155 @@ def owners(paths: Tuple[Path], use_shell: bool = True) -> Dict[Path, Ownership]:
 
 
 def evaluate_owner(path: Path) -> Ownership:
-    model_tag = "EXIF:Model"
-    if category(path=path) == Category.Undefined:
-        return Ownership.Undefined
-    with ExifToolHelper() as et:
-        metadata = et.get_tags(files=str(path), tags=model_tag)[0]
-    if model_tag in metadata:
-        return Ownership.Own if metadata[model_tag] in _my_camera_models else Ownership.Other
-    else:
-        return Ownership.Undefined
+    return evaluate_owners(paths=(path, ))[path]
 
 
 def evaluate_owners(paths: Tuple[Path]) -> Dict[Path, Ownership]:
-    model_tag = "EXIF:Model"
     all_owners = dict(zip(paths, [Ownership.Undefined, ] * len(paths)))
     pic_categories = categories(paths=paths)
-    for path in list(pic_categories.keys()):
-        if pic_categories[path] == Category.Undefined:
-            del pic_categories[path]
-    if len(pic_categories) == 0:
+    pictures = tuple(filter(lambda p: pic_categories[p] != Category.Undefined, paths))
+    if len(pictures) == 0:
         return all_owners
-    with ExifToolHelper() as et:
-        metadata = et.get_tags(files=list(pic_categories.keys()), tags=model_tag)
-    for i, path in enumerate(pic_categories):
-        pic_data = metadata[i]
-        if model_tag in pic_data:
-            all_owners[path] = Ownership.Own if pic_data[model_tag] in _my_camera_models else Ownership.Other
-        else:
-            all_owners[path] = Ownership.Undefined
+    models = get_models(paths=pictures)
+    for path in pictures:
+        all_owners[path] = _model_owner(model=models[path])
     return all_owners
 
 
+def cached_owners(paths: Tuple[Path]) -> Dict[Path, Ownership]:
+    cache = metadata_cache()
+    if cache is None:
+        return {}
+    models = cache.get_models(paths=paths)
+    return {path: _model_owner(model=model) for path, model in models.items()}
+
+
+def get_models(paths: Tuple[Path]) -> Dict[Path, Optional[str]]:
+    keys = {path: file_key(path=path) for path in paths}
+    models = {path: _models[key] for path, key in keys.items() if key in _models}
+    missing = tuple(filter(lambda p: p not in models, paths))
+    if len(missing) > 0:
+        fetched = _fetch_models(paths=missing)
+        for path, model in fetched.items():
+            if keys[path] is not None:
+                _models[keys[path]] = model
+        for _ in range(len(_models) - _models_limit):
+            del _models[next(iter(_models))]
+        models.update(fetched)
+    return models
+
+
+def prefetch(paths: Tuple[Path]) -> None:
+    pic_categories = categories(paths=paths)
+    get_models(paths=tuple(filter(lambda p: pic_categories[p] != Category.Undefined, paths)))
+
+
+def _fetch_models(paths: Tuple[Path]) -> Dict[Path, Optional[str]]:
+    with profiling.span("metadata") as span:
+        span.add(files=len(paths))
+        return _read_models(paths=paths)
+
+
+def _read_models(paths: Tuple[Path]) -> Dict[Path, Optional[str]]:
+    global metadata_fetches
+    metadata_fetches += 1
+    model_tag = "EXIF:Model"
+    cache = metadata_cache()
+    models = {} if cache is None else cache.get_models(paths=paths)
+    missing = tuple(filter(lambda p: p not in models, paths))
+    fetched = {}
+    unparsed = []
+    for path in missing:
+        try:
+            fetched[path] = exif.read_model(path=path)
+        except (ExifParseError, OSError):
+            unparsed.append(path)
+    if len(unparsed) > 0:
+        metadata = get_tags(files=unparsed, tags=model_tag)
+        for i, path in enumerate(unparsed):
+            fetched[path] = str(metadata[i][model_tag]) if model_tag in metadata[i] else None
+    if len(fetched) > 0:
+        if cache is not None:
+            cache.set_models(models=fetched)
+        models.update(fetched)
+    return models
+
+
+def _model_owner(model: Optional[str]) -> Ownership:
+    if model is None:
+        return Ownership.Undefined
+    return Ownership.Own if model in _my_camera_models else Ownership.Other
+
+
+def _claim_exiftools() -> None:
+    global _exiftools, _exiftool_locks, _exiftool_pid
+    if _exiftool_pid == os.getpid():
+        return
+    _inherited_exiftools.extend(filter(lambda e: e is not None, _exiftools))
+    _exiftools = [None, ] * len(_exiftools)
+    _exiftool_locks = [threading.Lock() for _ in _exiftools]
+    _exiftool_pid = os.getpid()
+
+
+def exiftool(worker: int = 0) -> "ExifToolHelper":
+    _claim_exiftools()
+    if _exiftools[worker] is None or not _exiftools[worker].running:
+        profiling.count(name="exiftool spawns")
+        _exiftools[worker] = _new_exiftool()
+    return _exiftools[worker]
+
+
+def _new_exiftool() -> "ExifToolHelper":
+    from exiftool import ExifToolHelper
+    return ExifToolHelper()
+
+
+def terminate_exiftool(worker: Optional[int] = None) -> None:
+    _claim_exiftools()
+    for index in range(len(_exiftools)) if worker is None else (worker, ):
+        if _exiftools[index] is not None and _exiftools[index].running:
+            _exiftools[index].terminate()
+        _exiftools[index] = None
+
+
+def set_exiftool_workers(workers: int) -> None:
+    global _exiftools, _exiftool_locks
+    terminate_exiftool()
+    _exiftools = [None, ] * max(1, workers)
+    _exiftool_locks = [threading.Lock() for _ in _exiftools]
+
+
+def get_tags(files: Sequence[Path], tags: Union[str, List[str]]) -> List[Dict]:
+    _claim_exiftools()
+    files = list(map(str, files))
+    shard_count = min(len(_exiftools), -(-len(files) // _min_shard_size))
+    if shard_count <= 1:
+        return _get_tags_with(worker=0, files=files, tags=tags)
+    from concurrent.futures import ThreadPoolExecutor
+    shard_size = -(-len(files) // shard_count)
+    shards = [files[i:i + shard_size] for i in range(0, len(files), shard_size)]
+    with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+        results = executor.map(_get_tags_with, range(len(shards)), shards, [tags, ] * len(shards))
+        return [metadata for result in results for metadata in result]
+
+
+def _get_tags_with(worker: int, files: List[str], tags: Union[str, List[str]]) -> List[Dict]:
+    from exiftool.exceptions import ExifToolProcessStateError, ExifToolExecuteException
+    with _exiftool_locks[worker], profiling.span("exiftool") as span:
+        span.add(files=len(files))
+        try:
+            try:
+                return exiftool(worker=worker).get_tags(files=files, tags=tags)
+            except (ExifToolProcessStateError, BrokenPipeError):
+                terminate_exiftool(worker=worker)
+                return exiftool(worker=worker).get_tags(files=files, tags=tags)
+        except ExifToolExecuteException as e:
+            raise MetadataError(paths=files) from e
+
+
+atexit.register(terminate_exiftool)
+
+
 def ask_owner(path: Path) -> Ownership:
     while True:
         picture_owner = input(f"please select ownership for {path} ('OWN' / 'OTHR'): ").upper()
@@ -0,0 +1,88 @@
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+from picstore.config import config
+from picstore.core.pictype import Ownership
+from picstore.core.error import InvalidRuleError
+
+
+rule_names = ("OWN", "OTHR", "SUFFIX", "EXIF")
+
+_owners = {"OWN": Ownership.Own, "OTHR": Ownership.Other}
+
+RuleSpec = Union[str, Dict[str, str]]
+
+
+class OwnerRule:
+    def __init__(self, root: Path, rules: Sequence[Tuple[str, str]]):
+        for _, name in rules:
+            if name not in rule_names:
+                raise InvalidRuleError(rule=name)
+        self._root = root
+        self._rules = [(pattern.casefold(), name) for pattern, name in rules]
+        self._suffix_owners = {suffix.upper(): Ownership.Other for suffix in config.other_suffixes}
+        self._suffix_owners.update({suffix.upper(): Ownership.Own for suffix in config.own_suffixes})
+
+    @staticmethod
+    def parse(root: Path, spec: RuleSpec) -> "OwnerRule":
+        if isinstance(spec, str):
+            return OwnerRule(root=root, rules=[("*", spec.upper())])
+        if isinstance(spec, dict):
+            return OwnerRule(root=root, rules=[(pattern, name.upper()) for pattern, name in spec.items()])
+        raise InvalidRuleError(rule=str(spec))
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    def owner(self, path: Path) -> Optional[Ownership]:
+        name = self._rule_name(path=path)
+        if name in _owners:
+            return _owners[name]
+        if name == "SUFFIX":
+            return self._suffix_owners.get(path.suffix.upper())
+        return None
+
+    def _rule_name(self, path: Path) -> str:
+        try:
+            relative = path.relative_to(self._root).as_posix().casefold()
+        except ValueError:
+            relative = path.name.casefold()
+        for pattern, name in self._rules:
+            if fnmatchcase(relative, pattern):
+                return name
+        return "EXIF"
+
+
+def source_rule(source: Path, spec: Optional[RuleSpec] = None) -> Optional[OwnerRule]:
+    if spec is None:
+        spec = _configured_spec(source=source)
+    return None if spec is None else OwnerRule.parse(root=source, spec=spec)
+
+
+def command_spec(owner: Optional[str], owner_globs: Optional[List[Tuple[str, str]]]) -> Optional[RuleSpec]:
+    if not owner_globs:
+        return owner
+    spec = dict(owner_globs)
+    if owner is not None:
+        spec.setdefault("*", owner)
+    return spec
+
+
+def parse_glob_rule(string: str) -> Tuple[str, str]:
+    pattern, separator, name = string.rpartition("=")
+    if separator == "" or pattern == "" or name.upper() not in rule_names:
+        raise ValueError(f"'{string}' is no GLOB=RULE pair")
+    return pattern, name.upper()
+
+
+def _configured_spec(source: Path) -> Optional[RuleSpec]:
+    source = source.absolute()
+    for source_rule_entry in config.source_rules:
+        try:
+            if Path(source_rule_entry["source"]).absolute() == source:
+                return source_rule_entry["rule"]
+        except (TypeError, KeyError):
+            raise InvalidRuleError(rule=str(source_rule_entry))
+    return None
+
@@ -1,8 +1,10 @@
+import os
 from collections.abc import Sequence
 from pathlib import Path
-from typing import List, Generator, Set
-import shutil
-from picstore.core import pictype
+from typing import List, Generator, Set, Optional, Dict
+from picstore import profiling
+from picstore.core import pictype, transfer, hashing
+from picstore.core.journal import Journal
 from picstore.core.error import NotASubDirError
 
 
@@ -27,19 +29,46 @@ class SubDir(Sequence[Path]):
         elif directory.name == "OTHR":
             self._categories = (pictype.Category.Raw, pictype.Category.Std)
             self._owners = (pictype.Ownership.Other, pictype.Ownership.Undefined)
-        self._content = self._load_content()
+        self._content: Optional[List[Path]] = None
+        self._names: Optional[Set[str]] = None
+        self._sizes: Dict[int, Set[str]] = {}
+        self._index_mtime_ns: Optional[int] = None
+        self._reserved: Set[str] = set()
 
     def __len__(self):
-        return len(self._content)
+        return len(self.content)
 
     def __getitem__(self, item):
-        return self._content[item]
+        return self.content[item]
 
     def _load_content(self) -> List[Path]:
         all_content = tuple(self.iterdir())
         types = pictype.get_types(paths=all_content, use_shell=False)
         return list(filter(lambda p: not self.is_ignored(path=p, category=types[p][0], owner=types[p][1]), all_content))
 
+    def _load_index(self) -> None:
+        self._index_mtime_ns = self.path.stat().st_mtime_ns
+        self._names = set(self._reserved)
+        self._sizes = {}
+        with profiling.span("scan") as span, os.scandir(self.path) as entries:
+            for entry in entries:
+                self._names.add(entry.name)
+                if entry.is_file():
+                    self._sizes.setdefault(entry.stat().st_size, set()).add(entry.name)
+            span.add(files=len(self._names))
+
+    def _refresh_index(self) -> None:
+        if self._names is None:
+            self._load_index()
+        elif len(self._reserved) == 0 and self._index_mtime_ns != self.path.stat().st_mtime_ns:
+            self._load_index()
+
+    @property
+    def content(self) -> List[Path]:
+        if self._content is None:
+            self._content = self._load_content()
+        return self._content
+
     @property
     def path(self) -> Path:
         return self._path
@@ -66,16 +95,72 @@ class SubDir(Sequence[Path]):
         return False
 
     def contains_name(self, name: str) -> bool:
-        return name in map(lambda p: p.name, self.iterdir())
-
-    def add(self, picture: Path, category: pictype.Category, owner: pictype.Ownership, copy: bool = True) -> bool:
+        self._refresh_index()
+        return name in self._names
+
+    def names_with_size(self, size: int) -> Set[str]:
+        self._refresh_index()
+        return self._sizes.get(size, set())
+
+    def estimate_count(self) -> int:
+        with os.scandir(self.path) as entries:
+            files = tuple(Path(e.path) for e in entries if e.is_file())
+        files = tuple(filter(lambda p: pictype.suffix_category(path=p) in self._categories, files))
+        owners = pictype.cached_owners(paths=files)
+        return len(list(filter(lambda p: p not in owners or owners[p] in self._owners, files)))
+
+    def contains_content(self, picture: Path) -> bool:
+        names = self.names_with_size(size=picture.stat().st_size)
+        return hashing.is_duplicate(candidate=picture, others=map(lambda n: self.path / n, names))
+
+    def reserve(self, name: str) -> None:
+        self._refresh_index()
+        self._reserved.add(name)
+        self._names.add(name)
+
+    def release(self, name: str) -> None:
+        self._reserved.discard(name)
+        if self._names is not None:
+            self._names.discard(name)
+            if len(self._reserved) == 0:
+                self._index_mtime_ns = self.path.stat().st_mtime_ns
+
+    def register(self, name: str, size: int) -> None:
+        self._reserved.discard(name)
+        self._content = None
+        if self._names is None:
+            return
+        self._names.add(name)
+        self._sizes.setdefault(size, set()).add(name)
+        if len(self._reserved) == 0:
+            self._index_mtime_ns = self.path.stat().st_mtime_ns
+
+    def add(
+            self,
+            picture: Path,
+            category: pictype.Category,
+            owner: pictype.Ownership,
+            copy: bool = True,
+            journal: Optional[Journal] = None
+    ) -> bool:
         if not self.is_addable(picture=picture, category=category, owner=owner):
             return False
-        shutil.copy2(src=picture, dst=self.path) if copy else shutil.move(src=picture, dst=self.path)
+        if journal is not None:
+            journal.plan(source=picture, destination=self.path / picture.name, copy=copy, size=picture.stat().st_size)
+        try:
+            size = transfer.transfer(source=picture, directory=self.path, copy=copy)
+        except OSError:
+            if journal is not None:
+                journal.failed(source=picture)
+            raise
+        if journal is not None:
+            journal.done(source=picture)
+        self.register(name=picture.name, size=size)
         return True
 
     def update(self) -> None:
-        self._content = self._load_content()
+        self._content = None
+        self._names = None
 
     def get_invalid_category_content(self) -> Set[Path]:
         pic_categories = pictype.categories(paths=tuple(self.iterdir()))
@@ -86,4 +171,7 @@ class SubDir(Sequence[Path]):
         return set(filter(lambda p: pic_owners[p] not in self._owners, pic_owners.keys()))
 
     def is_intact(self) -> bool:
-        return len(self.get_invalid_category_content()) == 0
+        with profiling.span("integrity") as span:
+            invalid = self.get_invalid_category_content()
+            span.add(files=len(invalid))
+        return len(invalid) == 0
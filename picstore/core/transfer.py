@@ -0,0 +1,188 @@
+import errno
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, List, Optional, Sequence, Tuple
+from picstore import profiling
+from picstore.config import config
+from picstore.core.journal import Journal
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+
+_block_size = 8 * 1024 * 1024
+_part_suffix = ".picstore-part"
+_sync_every = config.journal_sync_every
+
+
+def transfer(source: Path, directory: Path, copy: bool) -> int:
+    with profiling.span("transfer") as span:
+        size, copied = _transfer(source=source, directory=directory, copy=copy)
+        if copied and not copy:
+            sync_files(paths=[directory / source.name])
+            os.remove(source)
+        span.add(files=1, bytes=size)
+    return size
+
+
+def _transfer(source: Path, directory: Path, copy: bool) -> Tuple[int, bool]:
+    destination = directory / source.name
+    size = source.stat().st_size
+    if not copy and is_same_device(source=source, directory=directory):
+        try:
+            _publish(source=source, destination=destination)
+            return size, False
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+    copy_file(source=source, destination=destination)
+    return size, True
+
+
+def is_same_device(source: Path, directory: Path) -> bool:
+    return source.stat().st_dev == directory.stat().st_dev
+
+
+def part_file(destination: Path) -> Path:
+    return destination.with_name(f".{destination.name}{_part_suffix}")
+
+
+def is_part_file(path: Path) -> bool:
+    return path.name.startswith(".") and path.name.endswith(_part_suffix)
+
+
+def copy_file(source: Path, destination: Path) -> None:
+    if destination.exists():
+        raise FileExistsError(errno.EEXIST, "destination exists", str(destination))
+    part = part_file(destination=destination)
+    with open(source, "rb") as src, open(part, "wb") as dst:
+        try:
+            size = os.fstat(src.fileno()).st_size
+            if not _copy_zero_copy(src=src, dst=dst, size=size):
+                src.seek(0)
+                dst.seek(0)
+                dst.truncate()
+                shutil.copyfileobj(src, dst, _block_size)
+        except BaseException:
+            dst.close()
+            os.remove(part)
+            raise
+    try:
+        shutil.copystat(source, part)
+        _publish(source=part, destination=destination)
+    except BaseException:
+        if part.exists():
+            os.remove(part)
+        raise
+
+
+def _publish(source: Path, destination: Path) -> None:
+    try:
+        os.link(source, destination)
+    except FileExistsError:
+        raise
+    except OSError:
+        if destination.exists():
+            raise FileExistsError(errno.EEXIST, "destination exists", str(destination))
+        os.replace(source, destination)
+        return
+    os.remove(source)
+
+
+def sync_files(paths: Sequence[Path]) -> None:
+    directories = set()
+    for path in paths:
+        with open(path, "rb") as fp:
+            os.fsync(fp.fileno())
+        directories.add(path.parent)
+    for directory in directories:
+        try:
+            fd = os.open(directory, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+        except OSError:
+            continue
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+
+def _copy_zero_copy(src: BinaryIO, dst: BinaryIO, size: int) -> bool:
+    copied = 0
+    for method in ("copy_file_range", "sendfile"):
+        if not hasattr(os, method):
+            continue
+        try:
+            while copied < size:
+                if method == "copy_file_range":
+                    sent = os.copy_file_range(src.fileno(), dst.fileno(), min(_block_size, size - copied),
+                                              copied, copied)
+                else:
+                    sent = os.sendfile(dst.fileno(), src.fileno(), copied, min(_block_size, size - copied))
+                if sent == 0:
+                    break
+                copied += sent
+            return copied == size
+        except OSError as e:
+            if copied > 0 or e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF,
+                                             errno.EOPNOTSUPP, errno.ENOTSUP):
+                raise
+    return False
+
+
+class TransferPool:
+    def __init__(self, workers: int, journal: Optional[Journal] = None, sync_every: int = _sync_every):
+        from concurrent.futures import ThreadPoolExecutor
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="transfer")
+        self._journal = journal
+        self._sync_every = max(1, sync_every)
+        self._lock = threading.Lock()
+        self._unsynced: List[Tuple[Path, Path, bool]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.shutdown()
+
+    def submit(self, source: Path, directory: Path, copy: bool) -> "Future[int]":
+        return self._executor.submit(self._transfer, source, directory, copy)
+
+    def _transfer(self, source: Path, directory: Path, copy: bool) -> int:
+        with profiling.span("transfer") as span:
+            try:
+                size, copied = _transfer(source=source, directory=directory, copy=copy)
+            except BaseException:
+                if self._journal is not None:
+                    self._journal.failed(source=source)
+                raise
+            span.add(files=1, bytes=size)
+        with self._lock:
+            self._unsynced.append((source, directory / source.name, copied and not copy))
+            flush = len(self._unsynced) >= self._sync_every
+        if flush:
+            self.flush()
+        return size
+
+    def flush(self) -> None:
+        with self._lock:
+            unsynced = self._unsynced
+            self._unsynced = []
+        if len(unsynced) == 0:
+            return
+        moved = [destination for _, destination, remove_source in unsynced if remove_source]
+        with profiling.span("sync") as span:
+            sync_files(paths=moved)
+            span.add(files=len(moved))
+        for source, _, remove_source in unsynced:
+            if remove_source:
+                os.remove(source)
+            if self._journal is not None:
+                self._journal.done(source=source)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.flush()
@@ -0,0 +1,236 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from picstore.core import pictype, ingest
+
+
+_in_modify = 0x00000002
+_in_close_write = 0x00000008
+_in_moved_to = 0x00000080
+_in_create = 0x00000100
+_in_delete_self = 0x00000400
+_in_q_overflow = 0x00004000
+_in_ignored = 0x00008000
+_in_isdir = 0x40000000
+_watch_mask = _in_modify | _in_close_write | _in_moved_to | _in_create | _in_delete_self
+_event_header = struct.Struct("iIII")
+_read_size = 64 * 1024
+
+
+class Watcher(ABC):
+    def __init__(self, directories: Iterable[Path], recursive: bool):
+        ABC.__init__(self)
+        self._recursive = recursive
+        self._directories = list(directories)
+
+    @property
+    def directories(self) -> List[Path]:
+        return self._directories
+
+    @abstractmethod
+    def poll(self, timeout: float) -> List[Path]:
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class InotifyWatcher(Watcher):
+    def __init__(self, directories: Iterable[Path], recursive: bool):
+        Watcher.__init__(self, directories=directories, recursive=recursive)
+        self._libc = _load_libc()
+        if self._libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._watches: Dict[int, Path] = {}
+        try:
+            for directory in self._directories:
+                self._watch_tree(directory=directory)
+        except OSError:
+            self.close()
+            raise
+
+    def _watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _watch_mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+        self._watches[wd] = directory
+
+    def _watch_tree(self, directory: Path) -> None:
+        self._watch(directory=directory)
+        if self._recursive:
+            for sub_directory in _sub_directories(directory=directory):
+                self._watch(directory=sub_directory)
+
+    def poll(self, timeout: float) -> List[Path]:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if len(readable) == 0:
+            return []
+        try:
+            data = os.read(self._fd, _read_size)
+        except BlockingIOError:
+            return []
+        changed = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _event_header.unpack_from(data, offset)
+            name = data[offset + _event_header.size:offset + _event_header.size + length].rstrip(b"\0")
+            offset += _event_header.size + length
+            if mask & _in_q_overflow:
+                print("WARNING: inotify queue overflowed, some new files may have been missed", file=sys.stderr)
+                continue
+            if mask & (_in_ignored | _in_delete_self):
+                self._watches.pop(wd, None)
+                continue
+            if wd not in self._watches or len(name) == 0:
+                continue
+            path = self._watches[wd] / os.fsdecode(name)
+            if mask & _in_isdir:
+                if self._recursive and mask & (_in_create | _in_moved_to):
+                    self._watch_tree(directory=path)
+                    changed.extend(ingest.scan_files(directory=path, recursive=True))
+            elif mask & (_in_modify | _in_close_write | _in_moved_to):
+                changed.append(path)
+        return changed
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher(Watcher):
+    def __init__(self, directories: Iterable[Path], recursive: bool):
+        Watcher.__init__(self, directories=directories, recursive=recursive)
+        self._directory_mtimes: Dict[Path, int] = {}
+        self._files: Dict[Path, Tuple[int, int]] = {}
+        for directory in self._directories:
+            self._scan(directory=directory, report=False)
+
+    def _scan(self, directory: Path, report: bool) -> List[Path]:
+        changed = []
+        seen = set()
+        try:
+            self._directory_mtimes[directory] = directory.stat().st_mtime_ns
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        path = Path(entry.path)
+                        if self._recursive and path not in self._directory_mtimes:
+                            changed.extend(self._scan(directory=path, report=report))
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        path = Path(entry.path)
+                        seen.add(path)
+                        if self._files.get(path) != (stat.st_size, stat.st_mtime_ns):
+                            self._files[path] = stat.st_size, stat.st_mtime_ns
+                            if report:
+                                changed.append(path)
+        except FileNotFoundError:
+            self._directory_mtimes.pop(directory, None)
+        for path in [p for p in self._files if p.parent == directory and p not in seen]:
+            del self._files[path]
+        return changed
+
+    def poll(self, timeout: float) -> List[Path]:
+        time.sleep(timeout)
+        changed = []
+        for directory, mtime_ns in list(self._directory_mtimes.items()):
+            try:
+                current_mtime_ns = directory.stat().st_mtime_ns
+            except FileNotFoundError:
+                self._directory_mtimes.pop(directory)
+                continue
+            if current_mtime_ns != mtime_ns:
+                changed.extend(self._scan(directory=directory, report=True))
+        return changed
+
+
+class Debouncer:
+    def __init__(self, settle_seconds: float, batch_size: int):
+        self._settle_seconds = settle_seconds
+        self._batch_size = batch_size
+        self._pending: Dict[Path, Tuple[float, Optional[Tuple[int, int]]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, paths: Iterable[Path]) -> None:
+        now = time.monotonic()
+        for path in paths:
+            if pictype.suffix_category(path=path) != pictype.Category.Undefined:
+                self._pending[path] = now, _stat(path=path)
+
+    def ready(self) -> List[Path]:
+        now = time.monotonic()
+        batch = []
+        for path, (seen, stat) in list(self._pending.items()):
+            if now - seen < self._settle_seconds:
+                continue
+            current = _stat(path=path)
+            if current is None:
+                del self._pending[path]
+            elif current != stat:
+                self._pending[path] = now, current
+            else:
+                del self._pending[path]
+                batch.append(path)
+                if len(batch) >= self._batch_size:
+                    break
+        return batch
+
+
+def create_watcher(directories: Iterable[Path], recursive: bool, polling: bool = False) -> Watcher:
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(directories=directories, recursive=recursive)
+        except OSError:
+            pass
+    return PollingWatcher(directories=directories, recursive=recursive)
+
+
+def _load_libc() -> Optional[ctypes.CDLL]:
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = (ctypes.c_int, )
+        libc.inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def _stat(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _sub_directories(directory: Path) -> List[Path]:
+    sub_directories = []
+    pending = [directory]
+    while len(pending) > 0:
+        with os.scandir(pending.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    sub_directories.append(Path(entry.path))
+                    pending.append(Path(entry.path))
+    return sub_directories
+
@@ -0,0 +1,148 @@
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Union
+
+
+class Event(NamedTuple):
+    name: str
+    start_ns: int
+    duration_ns: int
+    thread: int
+    counters: Dict[str, int]
+
+
+class Span:
+
+    __slots__ = ("_name", "_start_ns", "_counters")
+
+    def __init__(self, name: str):
+        self._name = name
+        self._start_ns = 0
+        self._counters: Dict[str, int] = {}
+
+    def __enter__(self) -> "Span":
+        self._start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *_) -> None:
+        duration_ns = time.perf_counter_ns() - self._start_ns
+        event = Event(name=self._name,
+                      start_ns=self._start_ns,
+                      duration_ns=duration_ns,
+                      thread=threading.get_ident(),
+                      counters=self._counters)
+        with _lock:
+            _events.append(event)
+
+    def add(self, **counters: int) -> None:
+        for name, value in counters.items():
+            self._counters[name] = self._counters.get(name, 0) + value
+
+
+class _NullSpan:
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *_) -> None:
+        pass
+
+    def add(self, **counters: int) -> None:
+        pass
+
+
+_null_span = _NullSpan()
+_enabled = False
+_lock = threading.Lock()
+_events: List[Event] = []
+_counts: Dict[str, int] = {}
+_origin_ns = time.perf_counter_ns()
+
+
+def enable() -> None:
+    global _enabled
+    _enabled = True
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def span(name: str) -> Union[Span, _NullSpan]:
+    return Span(name=name) if _enabled else _null_span
+
+
+def count(name: str, value: int = 1) -> None:
+    if _enabled:
+        with _lock:
+            _counts[name] = _counts.get(name, 0) + value
+
+
+def phases() -> Dict[str, Dict[str, Union[int, float]]]:
+    with _lock:
+        events = list(_events)
+    totals: Dict[str, Dict[str, Union[int, float]]] = {}
+    for event in events:
+        total = totals.setdefault(event.name, {"calls": 0, "seconds": 0.0})
+        total["calls"] += 1
+        total["seconds"] += event.duration_ns / 1e9
+        for name, value in event.counters.items():
+            total[name] = total.get(name, 0) + value
+    return totals
+
+
+def summary_table() -> str:
+    tab = "   "
+    rows = [f"{'phase'.ljust(16)}{tab}{'calls'.rjust(8)}{tab}{'seconds'.rjust(10)}{tab}"
+            f"{'files'.rjust(8)}{tab}{'MB'.rjust(10)}{tab}{'MB/s'.rjust(8)}"]
+    rows.append("-" * len(rows[0]))
+    for name, total in sorted(phases().items(), key=lambda item: -item[1]["seconds"]):
+        megabytes = total.get("bytes", 0) / 1e6
+        throughput = f"{megabytes / total['seconds']:.1f}" if "bytes" in total and total["seconds"] > 0 else "-"
+        rows.append(f"{name.ljust(16)}{tab}{str(total['calls']).rjust(8)}{tab}{total['seconds']:10.4f}{tab}"
+                    f"{str(total.get('files', '-')).rjust(8)}{tab}"
+                    f"{(f'{megabytes:.1f}' if 'bytes' in total else '-').rjust(10)}{tab}{throughput.rjust(8)}")
+    with _lock:
+        counts = dict(_counts)
+    for name, value in sorted(counts.items()):
+        rows.append(f"{name.ljust(16)}{tab}{str(value).rjust(8)}")
+    return "\n".join(rows)
+
+
+def write_json(path: Path) -> None:
+    with _lock:
+        counts = dict(_counts)
+    with open(path, "w") as fp:
+        json.dump({"phases": phases(), "counts": counts}, fp, indent=2)
+
+
+def write_chrome_trace(path: Path) -> None:
+    with _lock:
+        events = list(_events)
+    pid = os.getpid()
+    trace = [{
+        "name": event.name,
+        "ph": "X",
+        "ts": (event.start_ns - _origin_ns) / 1e3,
+        "dur": event.duration_ns / 1e3,
+        "pid": pid,
+        "tid": event.thread,
+        "args": event.counters
+    } for event in events]
+    with open(path, "w") as fp:
+        json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, fp)
+
+
+def report(timings: bool, json_file: Optional[Path], trace_file: Optional[Path]) -> None:
+    if timings:
+        print(summary_table(), file=sys.stderr)
+    if json_file is not None:
+        write_json(path=json_file)
+    if trace_file is not None:
+        write_chrome_trace(path=trace_file)
@@ -0,0 +1,42 @@
+import io
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+from picstore.config import config
+from picstore.core import cache
+from benchmarks import fake_exiftool
+
+
+class TempDirTestCase(unittest.TestCase):
+    def setUp(self):
+        temporary_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(temporary_directory.cleanup)
+        self.directory = Path(temporary_directory.name)
+        environment = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": str(self.directory / "cache")})
+        environment.start()
+        self.addCleanup(environment.stop)
+        cache.close()
+        cache._cache = None
+        self.addCleanup(cache.close)
+        fake_exiftool.install()
+        fake_exiftool.FakeExifToolHelper.reset()
+
+    def set_config(self, **values) -> None:
+        settings = mock.patch.dict(config._load(), values)
+        settings.start()
+        self.addCleanup(settings.stop)
+
+    def make_directory(self, name: str) -> Path:
+        directory = self.directory / name
+        directory.mkdir(parents=True)
+        return directory
+
+
+def quietly(function, *args, **kwargs) -> str:
+    output = io.StringIO()
+    with redirect_stdout(output):
+        function(*args, **kwargs)
+    return output.getvalue()
@@ -0,0 +1,71 @@
+import struct
+import unittest
+from pathlib import Path
+from picstore.core import exif
+from picstore.core.error import ExifParseError
+from benchmarks import synthetic
+from tests.support import TempDirTestCase
+
+
+class ReadModelTest(TempDirTestCase):
+    def write(self, name: str, data: bytes) -> Path:
+        path = self.directory / name
+        path.write_bytes(data)
+        return path
+
+    def assertModel(self, name: str, data: bytes, model) -> None:
+        self.assertEqual(exif.read_model(path=self.write(name=name, data=data)), model)
+
+    def assertUnparsable(self, name: str, data: bytes) -> None:
+        with self.assertRaises(ExifParseError):
+            exif.read_model(path=self.write(name=name, data=data))
+
+    def test_little_endian_tiff(self):
+        self.assertModel("little.CR2", synthetic.tiff_bytes(model="Canon EOS 77D"), "Canon EOS 77D")
+
+    def test_big_endian_tiff(self):
+        self.assertModel("big.DNG", synthetic.tiff_bytes(model="NIKON D750", big_endian=True), "NIKON D750")
+
+    def test_inline_models(self):
+        for model in ("Z6", "X1D", "A"):
+            with self.subTest(model=model):
+                self.assertModel(f"{model}.CR2", synthetic.tiff_bytes(model=model), model)
+                self.assertModel(f"{model}.DNG", synthetic.tiff_bytes(model=model, big_endian=True), model)
+                self.assertModel(f"{model}.JPG", synthetic.jpeg_bytes(model=model), model)
+
+    def test_jpeg(self):
+        self.assertModel("plain.JPG", synthetic.jpeg_bytes(model="Pixel 6"), "Pixel 6")
+
+    def test_jpeg_with_app0_before_app1(self):
+        self.assertModel("jfif.JPG", synthetic.jpeg_bytes(model="Nokia 7 plus", app0=True), "Nokia 7 plus")
+
+    def test_png_exif_chunk(self):
+        self.assertModel("chunk.PNG", synthetic.png_bytes(model="SZ-31MR"), "SZ-31MR")
+
+    def test_model_beyond_the_header(self):
+        value = b"Canon EOS 77D\0"
+        value_offset = 2 * exif._header_size
+        ifd = struct.pack("<H", 1) + struct.pack("<HHII", 0x0110, 2, len(value), value_offset) + b"\0\0\0\0"
+        data = b"II" + struct.pack("<HI", 42, 8) + ifd
+        self.assertModel("far.CR2", data.ljust(value_offset, b"\0") + value, "Canon EOS 77D")
+
+    def test_missing_model(self):
+        self.assertModel("empty_ifd.CR2", b"II" + struct.pack("<HIH", 42, 8, 0) + b"\0\0\0\0", None)
+        self.assertModel("no_app1.JPG", b"\xff\xd8\xff\xda\0\x02", None)
+
+    def test_truncated_input(self):
+        self.assertUnparsable("short.CR2", synthetic.tiff_bytes(model="Canon EOS 77D")[:6])
+        self.assertUnparsable("short_ifd.CR2", synthetic.tiff_bytes(model="Canon EOS 77D")[:16])
+        self.assertUnparsable("short_value.CR2", synthetic.tiff_bytes(model="Canon EOS 77D")[:30])
+        self.assertUnparsable("short.JPG", synthetic.jpeg_bytes(model="Canon EOS 77D")[:20])
+        self.assertUnparsable("short.PNG", synthetic.png_bytes(model="Canon EOS 77D")[:30])
+
+    def test_garbage_input(self):
+        self.assertUnparsable("garbage.JPG", b"this is no picture at all")
+        self.assertUnparsable("empty.CR2", b"")
+        self.assertUnparsable("bad_magic.CR2", b"II" + struct.pack("<HI", 41, 8) + bytes(16))
+        self.assertUnparsable("opaque.CR2", synthetic.opaque_bytes(model="Canon EOS 77D"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import datetime
+import time
+import unittest
+from unittest import mock
+from picstore.core import ParentDir, pictype, ingest
+from benchmarks import synthetic
+from tests.support import TempDirTestCase
+
+
+class SlowSourceTest(TempDirTestCase):
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.source = synthetic.build_source(directory=self.directory / "source", pairs=4, own_ratio=1.0)
+        parent = self.make_directory("parent")
+        self.picdir = ParentDir(directory=parent).add(name="slow", date=datetime.datetime(2024, 5, 1))
+
+    def slow_scan(self):
+        for file in ingest.scan_files(directory=self.source, recursive=False):
+            time.sleep(3 * ingest._poll_interval)
+            yield file
+
+    def test_pauses_of_the_scanner_do_not_split_pairs(self):
+        with mock.patch.object(pictype, "get_types", wraps=pictype.get_types) as get_types:
+            pipeline = ingest.Ingest(route=self.picdir._route,
+                                     copy=False,
+                                     dedupe=False,
+                                     workers=2,
+                                     chunk_size=64,
+                                     display_tqdm=False,
+                                     description="adding")
+            count = pipeline.run(files=self.slow_scan())
+        self.assertEqual(count, 8)
+        chunks = [call.kwargs["paths"] for call in get_types.call_args_list]
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            stems = [path.stem for path in chunk]
+            for stem in stems:
+                self.assertEqual(stems.count(stem), 2, msg=f"{stem} was split across chunks")
+
+
+if __name__ == "__main__":
+    unittest.main()
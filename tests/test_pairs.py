@@ -0,0 +1,57 @@
+import datetime
+import unittest
+from picstore.commands.create import Create
+from picstore.commands.view import View
+from picstore.core import ParentDir
+from benchmarks import synthetic
+from tests.support import TempDirTestCase, quietly
+
+
+class MixedPairTest(TempDirTestCase):
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.parent = self.make_directory("parent")
+        self.source = self.make_directory("source")
+
+    def create(self) -> ParentDir:
+        quietly(Create.create,
+                directory=self.parent,
+                name="pairs",
+                date=datetime.datetime(2024, 5, 1),
+                source=self.source,
+                bare=False,
+                recursive=False,
+                copy=False,
+                workers=2,
+                dedupe=False,
+                owner=None,
+                owner_globs=None)
+        return ParentDir(directory=self.parent).get(name="pairs")
+
+    def test_pair_from_two_cameras_keeps_each_owner(self):
+        (self.source / "IMG_0001.CR2").write_bytes(synthetic.tiff_bytes(model="Canon EOS 77D"))
+        (self.source / "IMG_0001.JPG").write_bytes(synthetic.jpeg_bytes(model="iPhone 12"))
+        picdir = self.create()
+        self.assertEqual([p.name for p in picdir.raw.iterdir()], ["IMG_0001.CR2"])
+        self.assertEqual([p.name for p in picdir.other.iterdir()], ["IMG_0001.JPG"])
+        self.assertEqual(list(picdir.std.iterdir()), [])
+        self.assertAudited(picdir=picdir)
+
+    def test_member_without_model_is_not_owned_through_its_pair(self):
+        (self.source / "IMG_0002.CR2").write_bytes(synthetic.tiff_bytes(model="Canon EOS 77D"))
+        (self.source / "IMG_0002.JPG").write_bytes(b"\xff\xd8\xff\xda\0\x02")
+        picdir = self.create()
+        self.assertEqual([p.name for p in picdir.raw.iterdir()], ["IMG_0002.CR2"])
+        self.assertEqual([p.name for p in picdir.other.iterdir()], ["IMG_0002.JPG"])
+        self.assertEqual(picdir.std_count, 0)
+        self.assertAudited(picdir=picdir)
+
+    def assertAudited(self, picdir) -> None:
+        for directory in (picdir.raw, picdir.std, picdir.other):
+            self.assertEqual(directory.get_invalid_owner_content(), set(), msg=directory.name)
+        output = quietly(View.view, directory=self.parent, name="pairs")
+        self.assertNotIn("\tIMG_", output.split("Without RAW/STD counterpart")[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
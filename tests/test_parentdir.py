@@ -0,0 +1,98 @@
+import datetime
+import shutil
+import unittest
+from unittest import mock
+from picstore.commands.create import Create
+from picstore.commands.list import List
+from picstore.commands.view import View
+from picstore.core import ParentDir, PicDir
+from benchmarks import synthetic
+from tests.support import TempDirTestCase, quietly
+
+
+class CreateScanTest(TempDirTestCase):
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.set_config(use_catalog=True)
+        self.parent = synthetic.build_parent_dir(directory=self.directory / "parent", picdirs=20)
+
+    def create(self, name: str, source=None) -> str:
+        return quietly(Create.create,
+                       directory=self.parent,
+                       name=name,
+                       date=datetime.datetime(2024, 5, 1),
+                       source=source,
+                       bare=source is None,
+                       recursive=False,
+                       copy=False,
+                       workers=2,
+                       dedupe=False,
+                       owner=None,
+                       owner_globs=None)
+
+    def count_scans(self, function, *args, **kwargs) -> int:
+        with mock.patch.object(ParentDir, "_scan_names", autospec=True, side_effect=ParentDir._scan_names) as scan:
+            function(*args, **kwargs)
+        return scan.call_count
+
+    def test_bare_create_scans_the_parent_dir_once(self):
+        self.assertEqual(self.count_scans(self.create, name="bare"), 1)
+        self.assertTrue((self.parent / "2024-05-01_bare" / "RAW").is_dir())
+
+    def test_create_with_source_scans_the_parent_dir_once(self):
+        source = synthetic.build_source(directory=self.directory / "source", pairs=5, own_ratio=1.0)
+        self.assertEqual(self.count_scans(self.create, name="filled", source=source), 1)
+        self.assertEqual(len(list((self.parent / "2024-05-01_filled" / "RAW").iterdir())), 5)
+
+    def test_create_uses_the_catalog_of_an_unchanged_parent_dir(self):
+        ParentDir(directory=self.parent)
+        self.assertEqual(self.count_scans(self.create, name="cataloged"), 0)
+
+    def test_duplicate_create_is_refused_without_rescanning(self):
+        self.create(name="twice")
+        self.assertEqual(self.count_scans(self.create, name="twice"), 0)
+        self.assertEqual(len([p for p in self.parent.iterdir() if p.name.endswith("_twice")]), 1)
+
+
+class CatalogedEntriesTest(TempDirTestCase):
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.set_config(use_catalog=True)
+        self.parent = synthetic.build_parent_dir(directory=self.directory / "parent", picdirs=3)
+        quietly(List.list, directory=self.parent, sort=None, reverse=False)
+        self.broken = self.parent / "2020-01-02_picdir00001"
+        shutil.rmtree(self.broken / "LR")
+
+    def test_picdir_without_sub_directory_is_skipped(self):
+        parent_dir = ParentDir(directory=self.parent)
+        self.assertEqual({e.path for e in parent_dir.entries},
+                         {self.parent / "2020-01-01_picdir00000", self.parent / "2020-01-03_picdir00002"})
+        self.assertEqual(len(parent_dir), 2)
+        self.assertFalse(parent_dir.exists(name="picdir00001"))
+
+    def test_list_and_view_skip_a_picdir_without_sub_directory(self):
+        listed = quietly(List.list, directory=self.parent, sort="raw", reverse=False)
+        self.assertNotIn("picdir00001", listed)
+        self.assertIn("picdir00002", listed)
+        self.assertIn("not found", quietly(View.view, directory=self.parent, name="picdir00001"))
+
+    def test_restored_picdir_is_listed_again(self):
+        (self.broken / "LR").mkdir()
+        self.assertIn("picdir00001", quietly(List.list, directory=self.parent, sort=None, reverse=False))
+
+
+class PicDirStateTest(TempDirTestCase):
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.parent = synthetic.build_parent_dir(directory=self.directory / "parent", picdirs=1)
+        self.path = self.parent / "2020-01-01_picdir00000"
+
+    def test_state_lives_in_the_catalog_when_it_is_enabled(self):
+        self.set_config(use_catalog=True)
+        PicDir(path_or_parent=self.path).summary()
+        self.assertFalse((self.path / PicDir.state_file_name).exists())
+        self.assertIsNotNone(PicDir(path_or_parent=self.path).load_state())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+from unittest import mock
+from picstore.commands import repair
+from picstore.commands.list import List
+from picstore.core import PicDir, picdir
+from picstore.core.journal import Journal
+from benchmarks import synthetic
+from tests.support import TempDirTestCase, quietly
+
+
+class IncrementalRepairTest(TempDirTestCase):
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.parent = synthetic.build_parent_dir(directory=self.directory / "parent", picdirs=2)
+
+    def audited_picdirs(self):
+        with mock.patch.object(PicDir, "audit", autospec=True, side_effect=PicDir.audit) as audit:
+            quietly(repair.repair_all, directory=self.parent)
+        return sorted(call.args[0].name for call in audit.call_args_list)
+
+    def test_list_does_not_write_state_into_picdirs(self):
+        quietly(List.list, directory=self.parent, sort="raw", reverse=False)
+        self.assertEqual(list(self.parent.glob(f"*/{PicDir.state_file_name}")), [])
+
+    def test_listed_picdirs_are_still_audited_by_repair(self):
+        self.set_config(use_catalog=True)
+        quietly(List.list, directory=self.parent, sort="raw", reverse=False)
+        self.assertEqual(self.audited_picdirs(), ["picdir00000", "picdir00001"])
+        self.assertEqual(self.audited_picdirs(), [])
+
+    def test_changed_camera_models_invalidate_the_audit(self):
+        self.audited_picdirs()
+        with mock.patch.object(picdir, "_camera_models", "changed"):
+            self.assertEqual(self.audited_picdirs(), ["picdir00000", "picdir00001"])
+
+
+class SingleRepairTest(TempDirTestCase):
+    def test_single_repair_resumes_an_interrupted_add(self):
+        parent = synthetic.build_parent_dir(directory=self.directory / "parent", picdirs=1)
+        path = parent / "2020-01-01_picdir00000"
+        source = self.make_directory("source") / "IMG_9999.CR2"
+        source.write_bytes(synthetic.tiff_bytes(model="Canon EOS 77D"))
+        with Journal(directory=path, sync_every=1) as journal:
+            journal.plan(source=source, destination=path / "RAW" / source.name, copy=False,
+                         size=source.stat().st_size)
+        output = quietly(repair.Repair.repair, directory=path, single=True, jobs=1, full=False)
+        self.assertIn(f"repaired {path}", output)
+        self.assertTrue((path / "RAW" / source.name).exists())
+        self.assertFalse(source.exists())
+        self.assertEqual(PicDir(path_or_parent=path).pending_transfers(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
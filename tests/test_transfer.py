@@ -0,0 +1,128 @@
+import datetime
+import shutil
+import time
+import unittest
+from collections import namedtuple
+from unittest import mock
+from picstore.core import ParentDir, ingest, transfer
+from picstore.core.error import InsufficientSpaceError
+from picstore.core.journal import Journal
+from benchmarks import synthetic
+from benchmarks.fake_exiftool import FakeExifToolHelper
+from tests.support import TempDirTestCase, quietly
+
+
+class AddTest(TempDirTestCase):
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.source = synthetic.build_source(directory=self.directory / "source", pairs=4, own_ratio=1.0)
+        parent = self.make_directory("parent")
+        self.picdir = ParentDir(directory=parent).add(name="journaled", date=datetime.datetime(2024, 5, 1))
+
+    def added(self):
+        return sorted(p.name for d in (self.picdir.raw, self.picdir.std) for p in d.iterdir())
+
+    def test_files_are_streamed_into_the_pipeline(self):
+        def files():
+            scanned = list(ingest.scan_files(directory=self.source, recursive=False))
+            yield from scanned[:3]
+            deadline = time.monotonic() + 10
+            while len(self.added()) < 2 and time.monotonic() < deadline:
+                time.sleep(0.02)
+            streamed.append(len(self.added()))
+            yield from scanned[3:]
+
+        streamed = []
+        self.picdir.add_files(files=files(), display_tqdm=False)
+        self.assertEqual(streamed, [2])
+        self.assertEqual(len(self.added()), 8)
+        self.assertEqual(self.picdir.pending_transfers(), [])
+
+    def test_vanished_source_is_reported_per_file(self):
+        vanished = self.source / "IMG_00001.JPG"
+        route = self.picdir._route
+
+        def route_and_remove(picture, category, owner):
+            destination = route(picture, category, owner)
+            if picture == vanished:
+                picture.unlink()
+            return destination
+
+        self.picdir._route = route_and_remove
+        output = quietly(self.picdir.add, directory=self.source, display_tqdm=False)
+        self.assertIn(f"ERROR: Cannot transfer {vanished}", output)
+        self.assertEqual(len(self.added()), 7)
+        self.assertEqual(self.picdir.pending_transfers(), [])
+
+    def test_copy_is_refused_without_enough_space(self):
+        usage = namedtuple("usage", ("total", "used", "free"))
+        with mock.patch.object(shutil, "disk_usage", return_value=usage(total=100, used=90, free=10)):
+            with self.assertRaises(InsufficientSpaceError) as raised:
+                self.picdir.add(directory=self.source, display_tqdm=False, copy=True)
+        self.assertEqual(raised.exception.available, 10)
+        self.assertEqual(raised.exception.required, sum(p.stat().st_size for p in self.source.iterdir()))
+        self.assertEqual(self.added(), [])
+
+
+class MoveTest(TempDirTestCase):
+    def test_move_does_not_replace_an_existing_destination(self):
+        source = self.make_directory("source") / "a.jpg"
+        source.write_bytes(b"new")
+        directory = self.make_directory("destination")
+        (directory / "a.jpg").write_bytes(b"old")
+        with self.assertRaises(FileExistsError):
+            transfer.transfer(source=source, directory=directory, copy=False)
+        self.assertEqual(source.read_bytes(), b"new")
+        self.assertEqual((directory / "a.jpg").read_bytes(), b"old")
+
+
+class ResumeTest(TempDirTestCase):
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.source = synthetic.build_source(directory=self.directory / "source", pairs=3, own_ratio=1.0)
+        parent = self.make_directory("parent")
+        self.picdir = ParentDir(directory=parent).add(name="resumed", date=datetime.datetime(2024, 5, 1))
+
+    def test_planned_files_that_never_started_are_resumed(self):
+        submit = transfer.TransferPool.submit
+
+        def submit_once(pool, source, directory, copy):
+            if len(submitted) > 0:
+                raise RuntimeError("interrupted")
+            submitted.append(source)
+            return submit(pool, source=source, directory=directory, copy=copy)
+
+        submitted = []
+        with mock.patch.object(transfer.TransferPool, "submit", autospec=True, side_effect=submit_once):
+            with self.assertRaises(RuntimeError):
+                self.picdir.add(directory=self.source, display_tqdm=False, workers=1)
+        self.assertEqual(len(self.picdir.pending_transfers()), 5)
+        FakeExifToolHelper.reset()
+        self.assertEqual(self.picdir.resume(workers=2), 5)
+        self.assertEqual(FakeExifToolHelper.calls, 0)
+        self.assertEqual(list(self.source.iterdir()), [])
+        self.assertEqual(self.picdir.raw_count + self.picdir.std_count, 6)
+        self.assertEqual(self.picdir.pending_transfers(), [])
+
+    def test_interrupted_moves_are_synced_once(self):
+        sources = sorted(self.source.iterdir())
+        with Journal(directory=self.picdir.path, sync_every=1) as journal:
+            for source in sources:
+                directory = self.picdir.raw.path if source.suffix == ".CR2" else self.picdir.std.path
+                journal.plan(source=source, destination=directory / source.name, copy=False,
+                             size=source.stat().st_size)
+                if source.stem != "IMG_00002":
+                    shutil.copy2(source, directory / source.name)
+        self.assertEqual(len(self.picdir.pending_transfers()), 6)
+        with mock.patch.object(transfer, "sync_files", wraps=transfer.sync_files) as sync_files:
+            self.assertEqual(self.picdir.resume(workers=2), 6)
+        self.assertEqual(len(sync_files.call_args_list), 2)
+        self.assertEqual(len(sync_files.call_args_list[0].kwargs["paths"]), 4)
+        self.assertEqual(list(self.source.iterdir()), [])
+        self.assertEqual(self.picdir.raw_count + self.picdir.std_count, 6)
+        self.assertEqual(self.picdir.pending_transfers(), [])
+        self.assertFalse((self.picdir.path / Journal.file_name).exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
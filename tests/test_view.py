@@ -0,0 +1,31 @@
+import unittest
+from picstore.commands.view import View
+from picstore.core import pictype
+from benchmarks import synthetic
+from benchmarks.fake_exiftool import FakeExifToolHelper
+from tests.support import TempDirTestCase, quietly
+
+
+class ViewFetchTest(TempDirTestCase):
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.parent = synthetic.build_parent_dir(directory=self.directory / "parent",
+                                                 picdirs=3,
+                                                 files_per_subdir=20,
+                                                 opaque_ratio=0.2)
+        pictype.metadata_fetches = 0
+
+    def test_view_fetches_metadata_once(self):
+        output = quietly(View.view, directory=self.parent, name="picdir00001")
+        self.assertIn("#RAW:     16", output)
+        self.assertEqual(pictype.metadata_fetches, 1)
+        self.assertEqual(FakeExifToolHelper.calls, 1)
+
+    def test_repeated_view_does_not_fetch_again(self):
+        quietly(View.view, directory=self.parent, name="picdir00001")
+        quietly(View.view, directory=self.parent, name="picdir00001")
+        self.assertEqual(pictype.metadata_fetches, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+import datetime
+import io
+import sys
+import threading
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+from unittest import mock
+from picstore.commands import watch
+from picstore.core import ParentDir, watcher
+from benchmarks import synthetic
+from tests.support import TempDirTestCase
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class DebouncerTest(TempDirTestCase):
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.clock = FakeClock()
+        patch = mock.patch.object(watcher, "time", self.clock)
+        patch.start()
+        self.addCleanup(patch.stop)
+        self.debouncer = watcher.Debouncer(settle_seconds=2.0, batch_size=2)
+
+    def write(self, name: str, data: bytes = b"picture") -> Path:
+        path = self.directory / name
+        path.write_bytes(data)
+        return path
+
+    def test_file_is_ready_once_it_settled(self):
+        path = self.write("IMG_0001.JPG")
+        self.debouncer.add(paths=[path])
+        self.clock.now += 1.0
+        self.assertEqual(self.debouncer.ready(), [])
+        self.clock.now += 1.5
+        self.assertEqual(self.debouncer.ready(), [path])
+        self.assertEqual(len(self.debouncer), 0)
+
+    def test_growing_file_is_held_back(self):
+        path = self.write("IMG_0001.CR2")
+        self.debouncer.add(paths=[path])
+        self.clock.now += 2.5
+        self.write("IMG_0001.CR2", data=b"picture and more")
+        self.assertEqual(self.debouncer.ready(), [])
+        self.clock.now += 2.5
+        self.assertEqual(self.debouncer.ready(), [path])
+
+    def test_removed_and_unknown_files_are_dropped(self):
+        removed = self.write("IMG_0001.JPG")
+        self.debouncer.add(paths=[removed, self.write("notes.txt")])
+        self.assertEqual(len(self.debouncer), 1)
+        removed.unlink()
+        self.clock.now += 2.5
+        self.assertEqual(self.debouncer.ready(), [])
+        self.assertEqual(len(self.debouncer), 0)
+
+    def test_batches_are_limited(self):
+        paths = [self.write(f"IMG_000{i}.JPG") for i in range(5)]
+        self.debouncer.add(paths=paths)
+        self.clock.now += 2.5
+        batches = [self.debouncer.ready() for _ in range(3)]
+        self.assertEqual(list(map(len, batches)), [2, 2, 1])
+        self.assertEqual(sorted(p for batch in batches for p in batch), paths)
+
+
+class PollingWatcherTest(TempDirTestCase):
+    def test_existing_files_are_not_reported(self):
+        source = self.make_directory("source")
+        (source / "old.JPG").write_bytes(b"old")
+        with watcher.PollingWatcher(directories=[source], recursive=False) as polling:
+            self.assertEqual(polling.poll(timeout=0), [])
+
+    def test_new_and_changed_files_are_reported(self):
+        source = self.make_directory("source")
+        with watcher.PollingWatcher(directories=[source], recursive=False) as polling:
+            (source / "new.JPG").write_bytes(b"new")
+            self.assertEqual(polling.poll(timeout=0), [source / "new.JPG"])
+            self.assertEqual(polling.poll(timeout=0), [])
+            (source / "other.JPG").write_bytes(b"other")
+            (source / "new.JPG").write_bytes(b"rewritten")
+            self.assertEqual(sorted(polling.poll(timeout=0)), [source / "new.JPG", source / "other.JPG"])
+
+    def test_new_sub_directories_are_watched_when_recursive(self):
+        source = self.make_directory("source")
+        with watcher.PollingWatcher(directories=[source], recursive=True) as polling:
+            card = self.make_directory("source/card")
+            (card / "IMG_0001.CR2").write_bytes(b"raw")
+            self.assertEqual(polling.poll(timeout=0), [card / "IMG_0001.CR2"])
+
+    def test_sub_directories_are_ignored_when_not_recursive(self):
+        source = self.make_directory("source")
+        with watcher.PollingWatcher(directories=[source], recursive=False) as polling:
+            card = self.make_directory("source/card")
+            (card / "IMG_0001.CR2").write_bytes(b"raw")
+            self.assertEqual(polling.poll(timeout=0), [])
+
+    def test_removed_directory_is_forgotten(self):
+        source = self.make_directory("source")
+        sub_directory = self.make_directory("source/sub")
+        with watcher.PollingWatcher(directories=[source], recursive=True) as polling:
+            sub_directory.rmdir()
+            self.assertEqual(polling.poll(timeout=0), [])
+            self.assertEqual(polling.poll(timeout=0), [])
+
+
+class WatchLoopTest(TempDirTestCase):
+    def setUp(self):
+        TempDirTestCase.setUp(self)
+        self.source = self.make_directory("source")
+        parent = self.make_directory("parent")
+        self.picdir = ParentDir(directory=parent).add(name="watched", date=datetime.datetime(2024, 5, 1))
+
+    def run_loop(self, poll) -> int:
+        stop = threading.Event()
+        result = []
+
+        def loop() -> None:
+            result.append(watch._watch_loop(picdir=self.picdir,
+                                            source_rules={self.source: None},
+                                            recursive=True,
+                                            copy=False,
+                                            workers=2,
+                                            dedupe=False,
+                                            debouncer=watcher.Debouncer(settle_seconds=0.1, batch_size=4),
+                                            poll=poll,
+                                            stop=stop))
+
+        with redirect_stdout(io.StringIO()), redirect_stderr(io.StringIO()):
+            thread = threading.Thread(target=loop)
+            thread.start()
+            try:
+                time.sleep(0.2)
+                synthetic.build_source(directory=self.source / "card", pairs=3, own_ratio=1.0)
+                (self.source / "notes.txt").write_text("not a picture")
+                deadline = time.monotonic() + 10
+                while len(list(self.picdir.raw.iterdir())) + len(list(self.picdir.std.iterdir())) < 6:
+                    self.assertLess(time.monotonic(), deadline, msg="pictures were not added in time")
+                    time.sleep(0.05)
+            finally:
+                stop.set()
+                thread.join()
+        return result[0]
+
+    def assertAdded(self, count: int) -> None:
+        self.assertEqual(count, 6)
+        self.assertEqual(sorted(p.name for p in self.source.rglob("*") if p.is_file()), ["notes.txt"])
+        self.assertEqual(self.picdir.raw_count, 3)
+        self.assertEqual(self.picdir.std_count, 3)
+
+    def test_polling_watch_adds_new_pictures(self):
+        self.assertAdded(count=self.run_loop(poll=0.05))
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is only available on linux")
+    def test_inotify_watch_adds_new_pictures(self):
+        self.assertAdded(count=self.run_loop(poll=None))
+
+
+class WatcherTest(unittest.TestCase):
+    def test_watcher_is_abstract(self):
+        with self.assertRaises(TypeError):
+            watcher.Watcher(directories=[], recursive=False)
+
+
+if __name__ == "__main__":
+    unittest.main()